@@ -1,5 +1,26 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 import streamlit as st
-from supabase import create_client
+from supabase import ClientOptions, create_client
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a Supabase REST or storage request is abandoned
+SUPABASE_CLIENT_TIMEOUT = 30
+
+# Postgres function that applies many per-row values with one
+# UPDATE ... FROM jsonb_to_recordset(...); its definition is in the README
+BULK_UPDATE_RPC = "bulk_update_scraped_data"
+
+# REST requests kept in flight at once when BULK_UPDATE_RPC is unavailable
+SUPABASE_UPDATE_CONCURRENCY = 8
+
+# Only a successfully created client is kept, so a missing or broken
+# configuration is retried (and reported) on the next call
+_SUPABASE_CLIENT = None
+_SUPABASE_CLIENT_LOCK = threading.Lock()
 
 def get_api_key(model):
     """
@@ -8,7 +29,21 @@ def get_api_key(model):
     return st.secrets["OPENAI_API_KEY"]
 
 def get_supabase_client():
-    """Returns a Supabase client using credentials from Streamlit secrets."""
+    """
+    Returns a Supabase client using credentials from Streamlit secrets.
+    The client is created once per process and shared by every module, so
+    its underlying HTTP session keeps connections alive between calls.
+    """
+    global _SUPABASE_CLIENT
+    if _SUPABASE_CLIENT is not None:
+        return _SUPABASE_CLIENT
+    with _SUPABASE_CLIENT_LOCK:
+        if _SUPABASE_CLIENT is None:
+            _SUPABASE_CLIENT = _create_supabase_client()
+    return _SUPABASE_CLIENT
+
+def _create_supabase_client():
+    """Create a Supabase client from Streamlit secrets, or None when unavailable."""
     try:
         supabase_url = st.secrets["SUPABASE_URL"]
         supabase_key = st.secrets["SUPABASE_ANON_KEY"]
@@ -16,7 +51,70 @@ def get_supabase_client():
         if not supabase_url or not supabase_key or "your-supabase-url-here" in supabase_url:
             return None
 
-        return create_client(supabase_url, supabase_key)
+        options = ClientOptions(
+            postgrest_client_timeout=SUPABASE_CLIENT_TIMEOUT,
+            storage_client_timeout=SUPABASE_CLIENT_TIMEOUT,
+        )
+        return create_client(supabase_url, supabase_key, options=options)
     except Exception as e:
         st.error(f"Error connecting to Supabase: {e}")
         return None
+
+def bulk_update_scraped_data(column: str, values: Dict[str, Any]) -> List[str]:
+    """
+    Set `column` on the scraped_data rows of many unique_names in a single
+    request, through the BULK_UPDATE_RPC Postgres function (see the README).
+    When the function is not installed or the call fails, every row is
+    updated on its own instead, SUPABASE_UPDATE_CONCURRENCY at a time.
+    Returns the unique_names that could not be updated.
+    """
+    if not values:
+        return []
+
+    supabase = get_supabase_client()
+    if supabase is None:
+        logger.warning("Supabase client is not initialized; %d rows not updated", len(values))
+        return list(values)
+
+    updates = [{"unique_name": unique_name, "value": value} for unique_name, value in values.items()]
+    try:
+        supabase.rpc(BULK_UPDATE_RPC, {"target_column": column, "updates": updates}).execute()
+        return []
+    except Exception as e:
+        logger.warning("%s failed, updating %d rows one by one: %s", BULK_UPDATE_RPC, len(values), e)
+
+    def _update(item) -> Optional[str]:
+        unique_name, value = item
+        try:
+            supabase.table("scraped_data").update({column: value}).eq("unique_name", unique_name).execute()
+        except Exception as e:
+            logger.error("Failed to update %s for %s: %s", column, unique_name, e)
+            return unique_name
+        return None
+
+    with ThreadPoolExecutor(max_workers=min(SUPABASE_UPDATE_CONCURRENCY, len(values))) as executor:
+        return [unique_name for unique_name in executor.map(_update, values.items()) if unique_name is not None]
+
+def get_postgres_connection():
+    """
+    Returns a direct psycopg2 connection to the Supabase Postgres database,
+    or None when no DATABASE_URL is configured in Streamlit secrets or
+    psycopg2 is not installed.
+    Used for bulk writes that are too large to push through the REST API.
+    """
+    try:
+        database_url = st.secrets.get("DATABASE_URL")
+        if not database_url:
+            return None
+
+        # Optional dependency, only needed when DATABASE_URL is set
+        import psycopg2
+        return psycopg2.connect(database_url)
+    except ImportError:
+        logger.warning("DATABASE_URL is set but psycopg2 is not installed; using the REST API")
+        return None
+    except Exception as e:
+        # Called from the scraping worker thread, where st.error would be
+        # dropped; the caller falls back to the REST API
+        logger.warning("Could not connect to Postgres: %s", e)
+        return None
@@ -4,85 +4,160 @@ from HTML content. Especially useful for academic profiles where contact
 information might be protected against spam bots.
 """
 
-import re
+import functools
 import html
-from typing import List, Optional
-from bs4 import BeautifulSoup
+import re
+from typing import Iterator, List, Optional
+from bs4 import BeautifulSoup, SoupStrainer
+
+
+# Precompiled patterns shared by the extraction helpers
+EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+VALID_EMAIL_RE = re.compile(r'^' + EMAIL_RE.pattern + r'$')
+# The lookbehind only lets a match start at the beginning of a local-part run, so long
+# runs without an '@' (base64 images, minified JS) are scanned once instead of once per offset.
+EMAIL_SCAN_RE = re.compile(r'(?<![a-zA-Z0-9._%+-])' + EMAIL_RE.pattern)
+# A run of address characters and character references (&#64;, &#0064;, &#x40;, &commat;,
+# &#46;, fully encoded addresses, ...) holding at least one '@' or reference. Only these
+# runs are unescaped, so the document itself is never rewritten. As in html.unescape (and
+# browsers), numeric references may omit the ';' (user&#64example.com).
+_HTML_ENTITY = r'&(?:#[0-9]{1,7}(?![0-9]);?|#[xX][0-9a-fA-F]{1,6}(?![0-9a-fA-F]);?|[a-zA-Z][a-zA-Z0-9]{1,31};)'
+_ADDRESS_UNIT = r'(?:[a-zA-Z0-9._%+@-]|' + _HTML_ENTITY + r')'
+ENCODED_RUN_RE = re.compile(
+    r'(?<![a-zA-Z0-9._%+@-])' + _ADDRESS_UNIT + r'*(?:@|' + _HTML_ENTITY + r')' + _ADDRESS_UNIT + r'*'
+)
+SCRIPT_CONCAT_RE = re.compile(r'[\'"]([^\'"]*)[\'"]\s*\+\s*[\'"]@[\'"]\s*\+\s*[\'"]([^\'"]*)[\'"]')
+DOMAIN_RE = re.compile(r'@([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})')
+NAME_CLEAN_RE = re.compile(r'[^a-zA-Z\s]')
+MAILTO_HREF_RE = re.compile(r'^mailto:')
+
+EMAIL_DATA_ATTRS = ('data-email', 'data-name', 'data-domain')
+
+# Every tree-based method needs one of these markers in the raw source: a
+# literal or entity-encoded '@', a mailto: link, or a data attribute. Pages
+# with none of them (common for crawled markdown) skip the parse entirely.
+# Case-insensitive, since lxml lowercases attribute names like Data-Name.
+TREE_MARKER_RE = re.compile(r'@|mailto:|data-|&#|&commat;', re.IGNORECASE)
+
 
+class _EmailSourceStrainer(SoupStrainer):
+    """SoupStrainer that also keeps any tag carrying an email data attribute."""
 
-def extract_emails_from_html(html_content: str) -> List[str]:
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        if attrs and any(attr in attrs for attr in EMAIL_DATA_ATTRS):
+            return True
+        return super().allow_tag_creation(nsprefix, name, attrs)
+
+
+# Only the tags the helpers below actually read are built into the tree
+EMAIL_SOURCE_STRAINER = _EmailSourceStrainer(['a', 'script', 'h1', 'title'])
+
+def extract_emails_from_html(html_content: str, max_results: Optional[int] = None, soup: Optional[BeautifulSoup] = None) -> List[str]:
     """
     Extract email addresses from HTML content using multiple extraction techniques.
     
     Args:
         html_content: Raw HTML content of the webpage
+        max_results: Stop scanning once this many valid emails are found (None for all)
+        soup: An already parsed tree of html_content to reuse instead of parsing it again
         
     Returns:
-        A list of unique email addresses found
+        A list of unique email addresses found, in the order they were found
     """
-    emails = set()
+    # Insertion-ordered so callers that only need the first hit get a stable one
+    emails = {}
     
-    # Method 1: Direct regex extraction from the entire HTML
-    emails.update(_extract_emails_with_regex(html_content))
+    def add_valid(candidates) -> bool:
+        """Record valid candidates; True once max_results is reached."""
+        for email in candidates:
+            if email not in emails and _is_valid_email(email):
+                emails[email] = None
+                if max_results is not None and len(emails) >= max_results:
+                    return True
+        return False
     
-    # Method 2: Look for HTML decoded entities that might contain email parts
-    decoded_html = html.unescape(html_content)
-    emails.update(_extract_emails_with_regex(decoded_html))
+    # Method 1: Direct regex extraction from the entire HTML. Entity-encoded '@'
+    # is matched directly, so the document never needs to be unescaped.
+    if add_valid(_extract_emails_with_regex(html_content)):
+        return list(emails)
     
-    # Method 3: Parse with BeautifulSoup and look for mailto links
-    emails.update(_extract_emails_from_mailto(html_content))
+    if soup is None and not TREE_MARKER_RE.search(html_content):
+        return list(emails)
     
-    # Method 4: Look for common email obfuscation patterns
-    emails.update(_extract_obfuscated_emails(html_content))
+    # Parse once with the C-backed lxml parser and share the tree across methods
+    if soup is None:
+        soup = BeautifulSoup(html_content, 'lxml', parse_only=EMAIL_SOURCE_STRAINER)
     
-    # Method 5: Check for academic domain pattern if we have the name
+    # Method 2: Look for mailto links
+    if add_valid(_extract_emails_from_mailto(soup)):
+        return list(emails)
+    
+    # Method 3: Look for common email obfuscation patterns
+    if add_valid(_extract_obfuscated_emails(soup)):
+        return list(emails)
+    
+    # Method 4: Check for academic domain pattern if we have the name
     try:
-        name = _extract_name_from_academic_page(html_content)
+        name = _extract_name_from_academic_page(soup)
         if name:
             academic_email = _generate_academic_email_pattern(name, html_content)
             if academic_email:
-                emails.add(academic_email)
+                add_valid([academic_email])
     except:
         # Skip this method if it fails
         pass
-        
-    # Filter out invalid emails
-    valid_emails = [email for email in emails if _is_valid_email(email)]
     
-    return valid_emails
+    return list(emails)
 
 
-def _extract_emails_with_regex(text: str) -> List[str]:
-    """Extract emails using regex pattern matching."""
-    # Standard email regex pattern
-    email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-    return re.findall(email_pattern, text)
+def _extract_emails_with_regex(text: str) -> Iterator[str]:
+    """Extract emails using regex pattern matching, lazily so callers can stop early."""
+    if '&' not in text:
+        return _scan_plain_emails(text)
+    return _extract_encoded_emails(text)
 
 
-def _extract_emails_from_mailto(html_content: str) -> List[str]:
+def _scan_plain_emails(text: str) -> Iterator[str]:
+    """Scan text without character references, including addresses glued onto a previous one."""
+    for m in EMAIL_SCAN_RE.finditer(text):
+        yield m.group()
+        # The lookbehind stops a match from starting mid-run, which would skip an
+        # address glued straight onto this one ("a@x.com+b@y.org"); resume the
+        # scan exactly where this match ended instead
+        end = m.end()
+        while (glued := EMAIL_RE.match(text, end)) is not None:
+            yield glued.group()
+            end = glued.end()
+
+
+def _extract_encoded_emails(text: str) -> Iterator[str]:
+    """Unescape each address-like run that holds character references, then scan it."""
+    for run in ENCODED_RUN_RE.finditer(text):
+        chunk = run.group()
+        if '&' in chunk:
+            chunk = html.unescape(chunk)
+        yield from _scan_plain_emails(chunk)
+
+
+def _extract_emails_from_mailto(soup: BeautifulSoup) -> List[str]:
     """Extract emails from mailto: links."""
-    soup = BeautifulSoup(html_content, 'html.parser')
     emails = []
     
-    # Find all links with mailto:
-    mailto_links = soup.select('a[href^="mailto:"]')
-    for link in mailto_links:
-        href = link.get('href', '')
-        if 'mailto:' in href:
-            email = href.split('mailto:')[1].split('?')[0].strip()
-            if email:
-                emails.append(email)
+    # Find all links with mailto: (the href filter already guarantees the prefix)
+    for link in soup.find_all('a', href=MAILTO_HREF_RE):
+        email = link['href'][len('mailto:'):].split('?', 1)[0].strip()
+        if email:
+            emails.append(email)
     
     return emails
 
 
-def _extract_obfuscated_emails(html_content: str) -> List[str]:
+def _extract_obfuscated_emails(soup: BeautifulSoup) -> List[str]:
     """Extract emails that are obfuscated with various techniques."""
     emails = []
-    soup = BeautifulSoup(html_content, 'html.parser')
     
     # Method 1: Find elements with data attributes containing email parts
-    elements_with_data = soup.select('[data-email], [data-name], [data-domain]')
+    elements_with_data = soup.find_all(_has_email_data_attr)
     for element in elements_with_data:
         name = element.get('data-name', '')
         domain = element.get('data-domain', '')
@@ -96,32 +171,33 @@ def _extract_obfuscated_emails(html_content: str) -> List[str]:
     # Method 2: Look for scripts that build email addresses
     scripts = soup.find_all('script')
     for script in scripts:
-        if script.string and ('email' in script.string.lower() or '@' in script.string):
+        # The concatenation pattern needs a literal '@', so that alone is a sufficient probe
+        if script.string and '@' in script.string:
             # Look for patterns like "user" + "@" + "domain.com"
-            email_parts = re.findall(r'[\'"]([^\'"]*)[\'"]\s*\+\s*[\'"]@[\'"]\s*\+\s*[\'"]([^\'"]*)[\'"]', script.string)
+            email_parts = SCRIPT_CONCAT_RE.findall(script.string)
             for parts in email_parts:
                 if len(parts) == 2:
                     emails.append(f"{parts[0]}@{parts[1]}")
     
-    # Method 3: Look for common entity encoding &#64; for @
-    encoded_at_pattern = r'([a-zA-Z0-9._%+-]+)&#64;([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
-    for match in re.finditer(encoded_at_pattern, html_content):
-        if match and len(match.groups()) == 2:
-            emails.append(f"{match.group(1)}@{match.group(2)}")
-    
     return emails
 
 
-def _extract_name_from_academic_page(html_content: str) -> Optional[str]:
+def _has_email_data_attr(tag) -> bool:
+    """Match tags carrying any of the data attributes used to hide emails."""
+    return any(attr in tag.attrs for attr in EMAIL_DATA_ATTRS)
+
+
+def _extract_name_from_academic_page(soup: BeautifulSoup) -> Optional[str]:
     """Extract the person's name from an academic page."""
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
     # Try to find the person's name (common patterns in academic pages)
     # Method 1: Look for h1 tags (often contains the person's name)
-    h1_tags = soup.find_all('h1')
-    for h1 in h1_tags:
-        if h1.text and len(h1.text.strip()) > 0 and len(h1.text.strip().split()) <= 5:
-            return h1.text.strip()
+    # Walk h1 tags lazily so we stop at the first usable one
+    h1 = soup.find('h1')
+    while h1 is not None:
+        text = h1.text.strip()
+        if text and len(text.split()) <= 5:
+            return text
+        h1 = h1.find_next('h1')
     
     # Method 2: Look for title tag
     title = soup.find('title')
@@ -136,7 +212,7 @@ def _extract_name_from_academic_page(html_content: str) -> Optional[str]:
 def _generate_academic_email_pattern(name: str, html_content: str) -> Optional[str]:
     """Generate potential email based on name and academic context."""
     # Extract possible domain from the HTML content
-    domain_match = re.search(r'@([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', html_content)
+    domain_match = DOMAIN_RE.search(html_content)
     if not domain_match:
         return None
     
@@ -145,7 +221,7 @@ def _generate_academic_email_pattern(name: str, html_content: str) -> Optional[s
         return None
     
     # Clean up the name
-    name = re.sub(r'[^a-zA-Z\s]', '', name).strip().lower()
+    name = NAME_CLEAN_RE.sub('', name).strip().lower()
     name_parts = name.split()
     
     if len(name_parts) >= 2:
@@ -159,16 +235,23 @@ def _generate_academic_email_pattern(name: str, html_content: str) -> Optional[s
     return None
 
 
+@functools.lru_cache(maxsize=4096)
 def _is_valid_email(email: str) -> bool:
-    """Validate email structure."""
-    # Basic structural validation
-    if not email or '@' not in email or '.' not in email.split('@')[1]:
+    """Validate email structure. Cached, since the same addresses recur across pages."""
+    # Check reasonable length
+    if not email or len(email) < 5 or len(email) > 254:
         return False
     
-    # Check reasonable length
-    if len(email) < 5 or len(email) > 254:
+    # Basic structural validation: exactly one '@', with a dot after it
+    at_idx = email.find('@')
+    if at_idx < 1 or email.find('@', at_idx + 1) != -1:
+        return False
+    # RFC 5321 caps the local part at 64 characters; the shortest domain the
+    # regex accepts ("a.bc") is 4
+    if at_idx > 64 or len(email) - at_idx - 1 < 4:
+        return False
+    if '.' not in email[at_idx + 1:]:
         return False
     
     # Proper email regex validation
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(email_pattern, email)) 
\ No newline at end of file
+    return bool(VALID_EMAIL_RE.match(email))
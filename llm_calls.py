@@ -1,12 +1,24 @@
 # llm_calls.py
+import functools
 import litellm
-import json
+import orjson
 from litellm import (completion,token_counter,completion_cost,get_max_tokens,)
+from litellm.utils import type_to_response_format_param
+from pydantic import BaseModel
 from assets import USER_MESSAGE, OPENAI_MODEL_FULLNAME
 from api_management import get_api_key
 
 
 
+@functools.lru_cache(maxsize=64)
+def response_format_param(response_model):
+    """
+    Convert a Pydantic response model into the strict json_schema response_format
+    dict once per model class, instead of LiteLLM regenerating the schema on
+    every completion call.
+    """
+    return type_to_response_format_param(response_model)
+
 def call_llm_model(data,response_format,model,system_message,extra_user_instruction="",max_tokens=None,use_model_max_tokens_if_none=False):
     """
     Calls an LLM via LiteLLM and returns:
@@ -30,7 +42,8 @@ def call_llm_model(data,response_format,model,system_message,extra_user_instruct
     Returns:
         tuple: (parsed_response, token_counts, cost)
             - parsed_response: The parsed output (could be text or a structured object).
-            - token_counts: A dict with "input_tokens" and "output_tokens".
+            - token_counts: A dict with "input_tokens", "output_tokens" and
+              "cached_input_tokens" (prompt tokens served from the provider's prompt cache).
             - cost: The overall cost (in USD) for the API call.
     """
     # Get the API key
@@ -48,6 +61,10 @@ def call_llm_model(data,response_format,model,system_message,extra_user_instruct
         {"role": "user","content": f"{USER_MESSAGE} {extra_user_instruction} {data}"}
     ]
 
+    # Pydantic models are converted to their (cached) json_schema form up front
+    if isinstance(response_format, type) and issubclass(response_format, BaseModel):
+        response_format = response_format_param(response_format)
+
     # Prepare parameters for the LiteLLM completion call
     params = {
         "model": model,
@@ -72,13 +89,19 @@ def call_llm_model(data,response_format,model,system_message,extra_user_instruct
     # Make sure we convert the parsed response to a string for counting
     output_text = (
         parsed_response if isinstance(parsed_response, str)
-        else json.dumps(parsed_response)
+        else orjson.dumps(parsed_response).decode()
     )
     output_tokens = token_counter(model=model, text=output_text)
 
+    # Prompt tokens the provider served from its prompt cache (OpenAI caches
+    # repeated prompt prefixes automatically)
+    prompt_tokens_details = getattr(getattr(response, "usage", None), "prompt_tokens_details", None)
+    cached_input_tokens = getattr(prompt_tokens_details, "cached_tokens", None) or 0
+
     token_counts = {
         "input_tokens": input_tokens,
         "output_tokens": output_tokens,
+        "cached_input_tokens": cached_input_tokens,
     }
 
     # Calculate the total cost for the request
@@ -1,74 +1,223 @@
 # markdown.py
 
 import asyncio
-from typing import List
+import atexit
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
 from api_management import get_supabase_client
 from utils import generate_unique_name
 from crawl4ai import AsyncWebCrawler
-import json
 import subprocess
 import sys
 import streamlit as st
 import os
 
-supabase = get_supabase_client()
+logger = logging.getLogger(__name__)
 
-async def get_fit_markdown_async(url: str) -> str:
+PLAYWRIGHT_INSTALL_NEEDED = "PLAYWRIGHT_INSTALL_NEEDED"
+
+# Maximum number of pages crawled at once on the shared browser
+MARKDOWN_FETCH_CONCURRENCY = 8
+
+# A URL stored more recently than this is reused instead of being crawled again
+MARKDOWN_MAX_AGE = timedelta(hours=1)
+
+# .in_() filters travel in the GET query string, so long lists are split
+# into queries of at most this many values to stay under URL length limits
+SUPABASE_IN_BATCH_SIZE = 50
+
+# Receives (level, message) for user-facing messages, level being "error" or
+# "warning". Worker threads pass one in because Streamlit calls made outside
+# the script thread are silently dropped.
+MessageHandler = Callable[[str, str], None]
+
+# One event loop and one browser-backed crawler are reused for the whole
+# process instead of being created and torn down for every URL.
+_LOOP = None
+_CRAWLER = None
+_LOOP_LOCK = threading.Lock()
+
+
+def _run(coro):
+    """Run a coroutine to completion on the shared module-level event loop."""
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None or _LOOP.is_closed():
+            _LOOP = asyncio.new_event_loop()
+        return _LOOP.run_until_complete(coro)
+
+
+async def _get_crawler() -> AsyncWebCrawler:
+    """Lazily start the shared AsyncWebCrawler."""
+    global _CRAWLER
+    if _CRAWLER is None:
+        crawler = AsyncWebCrawler()
+        try:
+            await crawler.start()
+        except Exception:
+            await _close_quietly(crawler)
+            raise
+        _CRAWLER = crawler
+    return _CRAWLER
+
+
+async def _discard_crawler() -> None:
+    """
+    Close the shared crawler after an error so the next call starts a fresh
+    browser instead of reusing one that may have crashed or disconnected.
+    """
+    global _CRAWLER
+    crawler, _CRAWLER = _CRAWLER, None
+    if crawler is not None:
+        await _close_quietly(crawler)
+
+
+async def _close_quietly(crawler: AsyncWebCrawler) -> None:
+    try:
+        await crawler.close()
+    except Exception:
+        pass
+
+
+@atexit.register
+def _shutdown_crawler() -> None:
+    global _CRAWLER
+    if _LOOP is None or _LOOP.is_closed():
+        return
+    try:
+        if _CRAWLER is not None:
+            _LOOP.run_until_complete(_CRAWLER.close())
+    except Exception:
+        pass
+    finally:
+        _CRAWLER = None
+        _LOOP.close()
+
+
+async def get_fit_markdown_async(url: str, on_message: Optional[MessageHandler] = None) -> str:
     """
     Async function using crawl4ai's AsyncWebCrawler to produce the regular raw markdown.
     (Reverting from the 'fit' approach back to normal.)
     """
     try:
-        async with AsyncWebCrawler() as crawler:
-            result = await crawler.arun(url=url)
-            if result.success:
-                return result.markdown
-            else:
-                return ""
+        crawler = await _get_crawler()
+        return await _crawl_markdown(crawler, url)
     except Exception as e:
-        # Check if the error message contains the Playwright installation message
-        error_str = str(e)
-        if "Executable doesn't exist" in error_str and "playwright install" in error_str:
-            return "PLAYWRIGHT_INSTALL_NEEDED"
-        else:
-            st.error(f"Error scraping URL: {e}")
-            return ""
+        await _discard_crawler()
+        return _handle_crawl_error(e, on_message)
 
 
-def fetch_fit_markdown(url: str) -> str:
+async def fetch_all_async(urls_to_fetch: List[str], concurrency: int = MARKDOWN_FETCH_CONCURRENCY, on_message: Optional[MessageHandler] = None) -> Dict[str, str]:
+    """
+    Crawl many URLs concurrently on the shared AsyncWebCrawler.
+    At most `concurrency` pages are in flight at once.
+    Returns a dict mapping url -> markdown ("" when a page could not be scraped).
+    """
+    urls_to_fetch = list(dict.fromkeys(urls_to_fetch))
+    if not urls_to_fetch:
+        return {}
+
+    try:
+        crawler = await _get_crawler()
+    except Exception as e:
+        # The browser itself could not be started; every URL fails the same way
+        result = _handle_crawl_error(e, on_message)
+        return {url: result for url in urls_to_fetch}
+
+    sem = asyncio.Semaphore(concurrency)
+    failed = False
+
+    async def bounded(url: str) -> str:
+        nonlocal failed
+        async with sem:
+            try:
+                return await _crawl_markdown(crawler, url)
+            except Exception as e:
+                failed = True
+                return _handle_crawl_error(e, on_message)
+
+    results = await asyncio.gather(*(bounded(u) for u in urls_to_fetch))
+    if failed:
+        # Other pages were still using the browser while the error was raised,
+        # so it is only replaced once the whole batch has finished
+        await _discard_crawler()
+    return dict(zip(urls_to_fetch, results))
+
+
+async def _crawl_markdown(crawler: AsyncWebCrawler, url: str) -> str:
+    result = await crawler.arun(url=url)
+    if result.success:
+        return result.markdown
+    else:
+        return ""
+
+
+def _show_message(level: str, message: str) -> None:
+    """Default MessageHandler: show the message on the page (script thread only)."""
+    getattr(st, level)(message)
+
+
+def _handle_crawl_error(e: Exception, on_message: Optional[MessageHandler] = None) -> str:
+    # Check if the error message contains the Playwright installation message
+    error_str = str(e)
+    if "Executable doesn't exist" in error_str and "playwright install" in error_str:
+        return PLAYWRIGHT_INSTALL_NEEDED
+    else:
+        (on_message or _show_message)("error", f"Error scraping URL: {e}")
+        return ""
+
+
+def _show_playwright_install_error(on_message: Optional[MessageHandler] = None) -> None:
+    (on_message or _show_message)("error", """
+    ⚠️ **Playwright browsers not found!**
+    
+    Please restart the application and use the "Install Automatically" button,
+    or run this command in your terminal:
+    
+    ```
+    playwright install
+    ```
+    """)
+
+
+def fetch_fit_markdown(url: str, on_message: Optional[MessageHandler] = None) -> str:
     """
     Synchronous wrapper around get_fit_markdown_async().
     Handles Playwright installation if needed.
     """
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+    result = _run(get_fit_markdown_async(url, on_message))
     
-    try:
-        result = loop.run_until_complete(get_fit_markdown_async(url))
-        
-        # Check if we need to install Playwright browsers
-        if result == "PLAYWRIGHT_INSTALL_NEEDED":
-            st.error("""
-            ⚠️ **Playwright browsers not found!**
+    # Check if we need to install Playwright browsers
+    if result == PLAYWRIGHT_INSTALL_NEEDED:
+        _show_playwright_install_error(on_message)
+        return ""
             
-            Please restart the application and use the "Install Automatically" button,
-            or run this command in your terminal:
+    return result
+
+
+def fetch_fit_markdowns(urls: List[str], on_message: Optional[MessageHandler] = None) -> Dict[str, str]:
+    """
+    Synchronous wrapper around fetch_all_async().
+    Handles Playwright installation if needed.
+    """
+    results = _run(fetch_all_async(urls, on_message=on_message))
+    
+    # Check if we need to install Playwright browsers
+    if PLAYWRIGHT_INSTALL_NEEDED in results.values():
+        _show_playwright_install_error(on_message)
+        return {url: ("" if md == PLAYWRIGHT_INSTALL_NEEDED else md) for url, md in results.items()}
             
-            ```
-            playwright install
-            ```
-            """)
-            return ""
-                
-        return result
-    finally:
-        loop.close()
+    return results
 
 def read_raw_data(unique_name: str) -> str:
     """
     Query the 'scraped_data' table for the row with this unique_name,
     and return the 'raw_data' field.
+    raw_data is a JSONB column, so the client already hands back decoded values.
     """
+    supabase = get_supabase_client()
     if supabase is None:
         print("Warning: Supabase client is not initialized. Check your credentials.")
         return None
@@ -76,84 +225,158 @@ def read_raw_data(unique_name: str) -> str:
     response = supabase.table("scraped_data").select("raw_data").eq("unique_name", unique_name).execute()
     data = response.data
     if data and len(data) > 0:
-        raw_data = data[0]["raw_data"]
-        # If raw_data is a string, try to parse it as JSON
-        if isinstance(raw_data, str):
-            try:
-                return json.loads(raw_data)
-            except json.JSONDecodeError:
-                return raw_data
-        return raw_data
+        return data[0]["raw_data"]
     return None
 
+def in_batches(values: List[str], size: int = SUPABASE_IN_BATCH_SIZE) -> Iterator[List[str]]:
+    """Yield the distinct values in order, `size` at a time, for .in_() filters."""
+    values = list(dict.fromkeys(values))
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def read_raw_data_bulk(unique_names: List[str]) -> Dict[str, Any]:
+    """
+    Fetch the 'raw_data' field for many unique_names, SUPABASE_IN_BATCH_SIZE
+    names per query.
+    Returns a dict mapping unique_name -> raw_data for the rows that exist.
+    """
+    supabase = get_supabase_client()
+    if supabase is None:
+        print("Warning: Supabase client is not initialized. Check your credentials.")
+        return {}
+
+    raw_data = {}
+    for batch in in_batches(unique_names):
+        response = supabase.table("scraped_data").select("unique_name,raw_data").in_("unique_name", batch).execute()
+        raw_data.update((row["unique_name"], row["raw_data"]) for row in response.data or [])
+    return raw_data
+
+def read_fresh_unique_names(urls: List[str], max_age: timedelta = MARKDOWN_MAX_AGE) -> Dict[str, str]:
+    """
+    Find URLs whose raw_data was stored within max_age, querying
+    SUPABASE_IN_BATCH_SIZE URLs at a time.
+    Returns a dict mapping url -> unique_name of its newest such row.
+    Only names are selected; the raw_data itself is read later by the scraper.
+    """
+    supabase = get_supabase_client()
+    if supabase is None or not urls:
+        return {}
+
+    cutoff = (datetime.now(timezone.utc) - max_age).isoformat()
+    fresh = {}
+    try:
+        for batch in in_batches(urls):
+            response = (
+                supabase.table("scraped_data")
+                .select("unique_name,url")
+                .in_("url", batch)
+                .gte("created_at", cutoff)
+                .not_.is_("raw_data", "null")
+                .order("created_at", desc=True)
+                .execute()
+            )
+            for row in response.data or []:
+                # Rows come newest first, so the first one seen per URL wins
+                fresh.setdefault(row["url"], row["unique_name"])
+    except Exception as e:
+        # Treat lookup errors as "nothing fresh" so the URLs are crawled as before
+        print(f"\033[33mWARNING:Could not look up stored pages: {str(e)}\033[0m")
+        return {}
+    return fresh
+
 def save_raw_data(unique_name: str, url: str, raw_data: str) -> None:
     """
     Save or update the row in supabase with unique_name, url, and raw_data.
     If a row with unique_name doesn't exist, it inserts; otherwise it might upsert.
     """
-    # If raw_data is a string, try to parse it as JSON
-    if isinstance(raw_data, str):
-        try:
-            raw_data = json.loads(raw_data)
-        except json.JSONDecodeError:
-            # If it's not valid JSON, keep it as a string
-            pass
-    
-    supabase.table("scraped_data").upsert({
-        "unique_name": unique_name,
-        "url": url,
-        "raw_data": raw_data
-    }, on_conflict="id").execute()
-    BLUE = "\033[34m"
-    RESET = "\033[0m"
-    print(f"{BLUE}INFO:Raw data stored for {unique_name}{RESET}")
+    save_raw_data_bulk([(unique_name, url, raw_data)])
+
+def save_raw_data_bulk(rows: List[Tuple[str, str, Any]]) -> None:
+    """
+    Save many (unique_name, url, raw_data) rows to supabase in a single upsert.
+    """
+    if not rows:
+        return
 
-def fetch_and_store_markdowns(urls: List[str]) -> List[str]:
+    # raw_data goes into a JSONB column as-is: markdown is stored as a JSON
+    # string and dicts as objects, so there is nothing to parse here
+    payload = [
+        {"unique_name": unique_name, "url": url, "raw_data": raw_data}
+        for unique_name, url, raw_data in rows
+    ]
+
+    get_supabase_client().table("scraped_data").upsert(payload, on_conflict="id").execute()
+    logger.debug("Raw data stored for %d pages", len(rows))
+
+def fetch_and_store_markdowns(urls: List[str], on_message: Optional[MessageHandler] = None) -> List[str]:
     """
     For each URL:
       1) Generate unique_name
-      2) Check if there's already a row in supabase with that unique_name
-      3) If not found or if raw_data is empty, fetch fit_markdown
+      2) Check if supabase already has a recent row (see MARKDOWN_MAX_AGE) for that URL
+      3) If not found, fetch fit_markdown
+         (all missing URLs are crawled concurrently on one browser)
       4) Save to supabase
     Return a list of unique_names (one per URL).
+    From a worker thread, pass on_message: errors and warnings go to it and
+    the progress bar is not drawn.
     """
     unique_names = []
+    rows_to_save = []
+    show_message = on_message or _show_message
+    
+    # Progress widgets can only be drawn from the script thread
+    progress_bar = st.progress(0) if on_message is None else None
+    status_text = st.empty() if on_message is None else None
     
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+    # Look up recently stored pages in one round-trip instead of one per URL;
+    # those keep their unique_name, everything else gets a new one
+    fresh = read_fresh_unique_names(urls)
+    url_unique_names = [fresh.get(url) or generate_unique_name(url) for url in urls]
     
     total_urls = len(urls)
+    urls_to_fetch = [url for url in urls if url not in fresh]
+    fetched = {}
+    if urls_to_fetch:
+        if status_text is not None:
+            status_text.text(f"Scraping content from {len(urls_to_fetch)}/{total_urls} URLs...")
+        try:
+            fetched = fetch_fit_markdowns(urls_to_fetch, on_message)
+        except Exception as e:
+            show_message("error", f"Error scraping URLs: {str(e)}")
+    
     for i, url in enumerate(urls):
         try:
             # Update progress
-            progress = (i / total_urls)
-            progress_bar.progress(progress)
-            status_text.text(f"Processing URL {i+1}/{total_urls}: {url[:40]}...")
+            if progress_bar is not None:
+                progress_bar.progress(i / total_urls)
+                status_text.text(f"Processing URL {i+1}/{total_urls}: {url[:40]}...")
             
-            unique_name = generate_unique_name(url)
-            MAGENTA = "\033[35m"
-            RESET = "\033[0m"
+            unique_name = url_unique_names[i]
             # check if we already have raw_data in supabase
-            raw_data = read_raw_data(unique_name)
-            if raw_data:
-                print(f"{MAGENTA}Found existing data in supabase for {url} => {unique_name}{RESET}")
+            if url in fresh:
+                logger.debug("Found existing data in supabase for %s => %s", url, unique_name)
             else:
-                # fetch fit markdown
-                status_text.text(f"Scraping content from URL {i+1}/{total_urls}: {url[:40]}...")
-                fit_md = fetch_fit_markdown(url)
+                fit_md = fetched.get(url, "")
                 if fit_md:
-                    save_raw_data(unique_name, url, fit_md)
+                    rows_to_save.append((unique_name, url, fit_md))
                 else:
-                    st.warning(f"Could not scrape content from {url}. Skipping.")
+                    show_message("warning", f"Could not scrape content from {url}. Skipping.")
             unique_names.append(unique_name)
         except Exception as e:
-            st.error(f"Error processing URL {url}: {str(e)}")
+            show_message("error", f"Error processing URL {url}: {str(e)}")
             # Still add the unique name to keep the list consistent
-            unique_name = generate_unique_name(url)
-            unique_names.append(unique_name)
+            unique_names.append(url_unique_names[i])
+
+    # Store everything that was scraped in one round-trip
+    if rows_to_save:
+        try:
+            save_raw_data_bulk(rows_to_save)
+        except Exception as e:
+            show_message("error", f"Error saving scraped content: {str(e)}")
 
     # Clear the progress indicators
-    progress_bar.empty()
-    status_text.empty()
+    if progress_bar is not None:
+        progress_bar.empty()
+        status_text.empty()
     
     return unique_names
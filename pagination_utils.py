@@ -0,0 +1,186 @@
+# pagination_utils.py
+#
+# Pure URL and search helpers used by pagination.py. They only need the
+# standard library and orjson, so they import (and test) without the
+# Streamlit, Supabase and LLM stack that pagination.py pulls in.
+
+import functools
+import re
+from typing import Dict, List, Optional
+import orjson
+
+# Common patterns for page numbers in URLs, tried in order by extract_page_number:
+# query parameters take priority over path/file markers
+PAGE_NUMBER_PATTERNS = tuple(re.compile(pattern) for pattern in [
+    r'[?&]page=(\d+)',           # ?page=X or &page=X
+    r'[?&]p=(\d+)',              # ?p=X or &p=X
+    r'[?&]pg=(\d+)',             # ?pg=X or &pg=X
+    r'[?&]paged=(\d+)',          # ?paged=X or &paged=X
+    r'[?&]paging=(\d+)',         # ?paging=X or &paging=X
+    r'[?&]pp=(\d+)',             # ?pp=X or &pp=X
+    r'[?&]pagina=(\d+)',         # ?pagina=X or &pagina=X (Spanish/Italian)
+    r'[?&]seite=(\d+)',          # ?seite=X or &seite=X (German)
+    r'[?&]pagine=(\d+)',         # ?pagine=X or &pagine=X
+    r'[?&]pagination=(\d+)',     # ?pagination=X
+    r'[?&]current=(\d+)',        # ?current=X or &current=X
+    r'[?&]offset=(\d+)',         # ?offset=X or &offset=X
+    r'/page/(\d+)',              # /page/X
+    r'/p/(\d+)',                 # /p/X
+    r'/paged/(\d+)',             # /paged/X
+    r'/pages/(\d+)',             # /pages/X
+    r'-page-(\d+)',              # -page-X
+    r'_page_(\d+)',              # _page_X
+    r'-p-(\d+)',                 # -p-X
+    r'_p_(\d+)',                 # _p_X
+    r'[\-_](\d+)\.html',         # -X.html or _X.html
+    r'/(\d+)/?$',                # /X/ at end of URL
+    r'page(\d+)\.html',          # pageX.html
+    r'p(\d+)\.html',             # pX.html
+])
+
+# All patterns fused into one alternation, used only as a quick "any marker?"
+# check so URLs without one are scanned once instead of 24 times. It can't pick
+# the number itself: within an alternation the leftmost marker wins, so
+# ?offset=20&page=3 would give 20 instead of 3.
+PAGE_NUMBER_ANY_RE = re.compile('|'.join(pattern.pattern for pattern in PAGE_NUMBER_PATTERNS))
+
+# Heuristics used by is_likely_first_page
+FIRST_PAGE_ROOT_RE = re.compile(r'^https?://[^/]+/?$')
+FIRST_PAGE_INDEX_RE = re.compile(r'/$|/index\.(?:html|php|asp|jsp)$')
+PAGINATED_PARAM_RE = re.compile(r'page=|/page/|\?p=|&p=')
+
+# Search terms for search_faculty_by_prompt; single characters match nearly every profile
+SEARCH_TOKEN_RE = re.compile(r'\w{2,}')
+
+
+@functools.lru_cache(maxsize=4096)
+def extract_page_number(url: str) -> Optional[int]:
+    """
+    Extract page number from a URL.
+    
+    Args:
+        url: URL to extract page number from
+    
+    Returns:
+        Page number as integer, or None if not found
+    """
+    if not PAGE_NUMBER_ANY_RE.search(url):
+        return None
+    
+    # Patterns are tried in priority order, so e.g. page= beats offset=
+    for pattern in PAGE_NUMBER_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            try:
+                page_num = int(match.group(1))
+                # Print diagnostic info for debugging
+                # print(f"{MAGENTA}Extracted page number {page_num} from URL: {url}{RESET}")
+                return page_num
+            except ValueError:
+                pass
+    
+    # If no page number found, default to None
+    # print(f"{MAGENTA}No page number found in URL: {url}{RESET}")
+    return None
+
+def is_likely_first_page(url: str) -> bool:
+    """
+    Determine if a URL is likely the first page of content.
+    This function uses heuristics to detect page 1 even without explicit page numbers.
+    
+    Args:
+        url: URL to check
+    
+    Returns:
+        True if the URL is likely page 1, False otherwise
+    """
+    # Check for explicit page 1 markers
+    page_number = extract_page_number(url)
+    if page_number == 1:
+        return True
+    
+    # Check for common patterns that indicate a base/first page
+    # 1. Base domain with no pagination parameters
+    if FIRST_PAGE_ROOT_RE.match(url):
+        return True
+    
+    # 2. URLs ending with / or common index files
+    if FIRST_PAGE_INDEX_RE.search(url):
+        return True
+    
+    # 3. No pagination parameters at all
+    if not PAGINATED_PARAM_RE.search(url):
+        return True
+    
+    return False
+
+def filter_page_urls(page_urls: List[str], original_urls, start_page: int, end_page: Optional[int], skip_first_page: bool) -> List[str]:
+    """
+    Single-pass filter for the pagination URLs detected on one source page.
+    Drops original URLs, pages outside [start_page, end_page], repeated page
+    numbers and, when skip_first_page is set, URLs that look like page 1.
+    URLs without a detectable page number are kept.
+    """
+    filtered_urls = []
+    # The original URLs are scraped anyway, so their page numbers count as
+    # seen: another URL for the same page (?page=2 vs /page/2) is dropped
+    seen_page_numbers = {extract_page_number(url) for url in original_urls}
+    seen_page_numbers.discard(None)
+    for url in page_urls:
+        if url in original_urls:
+            continue
+        page_number = extract_page_number(url)
+        if page_number is None:
+            if not (skip_first_page and is_likely_first_page(url)):
+                filtered_urls.append(url)
+            continue
+        if page_number in seen_page_numbers or page_number < start_page:
+            continue
+        if end_page is not None and page_number > end_page:
+            continue
+        seen_page_numbers.add(page_number)
+        filtered_urls.append(url)
+    return filtered_urls
+
+def search_faculty_by_prompt(faculty_profiles: List[Dict], prompt: str) -> List[Dict]:
+    """
+    Filter faculty profiles based on user-defined criteria in natural language
+    
+    Args:
+        faculty_profiles: List of faculty profile data
+        prompt: Natural language prompt describing search criteria
+        
+    Returns:
+        Filtered list of faculty profiles matching the criteria
+    """
+    if not prompt or not faculty_profiles:
+        return faculty_profiles
+    
+    # This is a simplified implementation
+    # In a real implementation, you would:
+    # 1. Use an embedding model to compare the prompt with faculty profiles
+    # 2. Or use a language model to evaluate each profile against the criteria
+    
+    # For now, we'll do basic keyword matching
+    prompt = prompt.lower()
+    # Short or symbol-only prompts ("c++", "R") have no qualifying word, so
+    # fall back to the raw whitespace-separated terms as before
+    keywords = SEARCH_TOKEN_RE.findall(prompt) or prompt.split()
+    # Nothing to match on (a blank prompt): skip the profile scan
+    if not keywords:
+        return faculty_profiles
+    # All keywords in one alternation, so each profile is scanned once
+    keyword_re = re.compile('|'.join(re.escape(keyword) for keyword in dict.fromkeys(keywords)))
+    # The reason only depends on the prompt, so build it once
+    match_reason = f"Matched search terms in prompt: '{prompt}'"
+    filtered_profiles = []
+    
+    for profile in faculty_profiles:
+        profile_text = orjson.dumps(profile, option=orjson.OPT_NON_STR_KEYS).decode().lower()
+        
+        # Check if any keywords from the prompt are in the profile
+        if keyword_re.search(profile_text):
+            # Add a reason for the match
+            filtered_profiles.append({**profile, "match_reason": match_reason})
+    
+    return filtered_profiles
@@ -0,0 +1,49 @@
+# scrape_batching.py
+#
+# Pure helpers for packing small pages into shared LLM calls and splitting
+# such a call's usage back across its pages. They have no third-party
+# imports, so they can be tested without the scraping stack.
+
+from typing import Dict, List, Optional, Tuple
+
+# Pages with at most this many characters of raw_data are packed several to
+# an LLM call, up to SCRAPE_BATCH_MAX_PAGES pages / SCRAPE_BATCH_MAX_CHARS characters
+SCRAPE_SMALL_PAGE_CHARS = 6000
+SCRAPE_BATCH_MAX_PAGES = 5
+SCRAPE_BATCH_MAX_CHARS = 24000
+PAGE_HEADER = "=== PAGE {} ==="
+
+
+def pack_small_pages(pages: List[tuple]) -> List[List[tuple]]:
+    """
+    Greedily group small pages (tuples whose last item is the page text) into
+    batches of at most SCRAPE_BATCH_MAX_PAGES pages and SCRAPE_BATCH_MAX_CHARS
+    characters. Pages are packed smallest first; single-page groups are returned too.
+    """
+    batches, current, current_chars = [], [], 0
+    for page in sorted(pages, key=lambda page: len(page[-1])):
+        page_chars = len(page[-1])
+        if current and (current_chars + page_chars > SCRAPE_BATCH_MAX_CHARS or len(current) >= SCRAPE_BATCH_MAX_PAGES):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(page)
+        current_chars += page_chars
+    if current:
+        batches.append(current)
+    return batches
+
+def split_usage(token_counts: Dict[str, int], cost: float, n: int) -> List[Tuple[Dict[str, int], float]]:
+    """Split one LLM call's token counts and cost evenly across n pages (remainders go first)."""
+    return [
+        ({key: value // n + (1 if i < value % n else 0) for key, value in token_counts.items()}, cost / n)
+        for i in range(n)
+    ]
+
+def add_usage(result: Optional[tuple], extra: Optional[Tuple[Dict[str, int], float]]) -> Optional[tuple]:
+    """Add an extra (token_counts, cost) share onto a (parsed, token_counts, cost) result."""
+    if result is None or extra is None:
+        return result
+    parsed, token_counts, cost = result
+    extra_counts, extra_cost = extra
+    merged = {key: token_counts.get(key, 0) + extra_counts.get(key, 0) for key in token_counts.keys() | extra_counts.keys()}
+    return parsed, merged, cost + extra_cost
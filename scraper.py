@@ -1,26 +1,51 @@
 # scraper.py
 
-import json
-from typing import List, Dict, Any
+import asyncio
+import functools
+import hashlib
+import io
+import logging
+import orjson
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from pydantic import BaseModel, create_model
 from assets import (OPENAI_MODEL_FULLNAME,SYSTEM_MESSAGE)
 from llm_calls import (call_llm_model)
-from markdown import read_raw_data
-from api_management import get_supabase_client
+from markdown import in_batches, read_raw_data, read_raw_data_bulk
+from api_management import get_supabase_client, get_postgres_connection, bulk_update_scraped_data
 from utils import  generate_unique_name
 from email_extractor import extract_emails_from_html
+from scrape_batching import (PAGE_HEADER, SCRAPE_SMALL_PAGE_CHARS, pack_small_pages,
+                             split_usage, add_usage)
 
-supabase = get_supabase_client()
+logger = logging.getLogger(__name__)
+
+# Maximum number of scraping LLM calls in flight at once
+SCRAPE_LLM_CONCURRENCY = 8
+
+# From this many rows, formatted_data is written with Postgres COPY when a
+# DATABASE_URL is configured, bypassing the REST API
+FORMATTED_DATA_COPY_THRESHOLD = 100
+
+def listing_schema_key(field_names: List[str]) -> Tuple[str, ...]:
+    """Hashable, order-preserving field tuple (always ending in 'email') used to cache models."""
+    return tuple(dict.fromkeys([*field_names, 'email']))
+
+@functools.lru_cache(maxsize=64)
+def _dynamic_listing_model(schema_key: Tuple[str, ...]):
+    field_definitions = {field: (str, ...) for field in schema_key}
+    return create_model('DynamicListingModel', **field_definitions)
 
 def create_dynamic_listing_model(field_names: List[str]):
     if 'email' not in field_names:
         field_names.append('email')
-    field_definitions = {field: (str, ...) for field in field_names}
-    return create_model('DynamicListingModel', **field_definitions)
+    # Pydantic model creation is expensive, so reuse the class for a known field set
+    return _dynamic_listing_model(listing_schema_key(field_names))
 
+@functools.lru_cache(maxsize=64)
 def create_listings_container_model(listing_model: BaseModel):
     return create_model('DynamicListingsContainer', listings=(List[listing_model], ...))
 
+@functools.lru_cache(maxsize=64)
 def generate_system_message(listing_model: BaseModel) -> str:
     # same logic as your code
     schema_info = listing_model.model_json_schema()
@@ -44,41 +69,150 @@ def generate_system_message(listing_model: BaseModel) -> str:
     return final_prompt
 
 
+@functools.lru_cache(maxsize=64)
+def create_pages_container_model(listing_model: BaseModel):
+    # One entry per packed page; a list keeps the schema valid for strict structured outputs
+    page_model = create_model('DynamicPageListings', page_id=(str, ...), listings=(List[listing_model], ...))
+    return create_model('DynamicPagesContainer', pages=(List[page_model], ...))
+
+@functools.lru_cache(maxsize=64)
+def generate_batch_system_message(listing_model: BaseModel) -> str:
+    header = PAGE_HEADER.format("<page_id>")
+    return generate_system_message(listing_model) + f"""
+    The text contains several pages, each starting with a line "{header}".
+    Extract the listings of every page separately, using the schema above for each page,
+    and return them as {{"pages": [{{"page_id": "<page_id>", "listings": [...]}}]}}
+    with exactly one entry per page.
+    """
+
+def _formatted_data_json(formatted_data):
+    """
+    Convert formatted data (string, dictionary or Pydantic model) to the
+    JSON-compatible value stored in the formatted_data column.
+    """
+    if isinstance(formatted_data, str):
+        try:
+            return orjson.loads(formatted_data)
+        except orjson.JSONDecodeError:
+            return {"raw_text": formatted_data}
+    if hasattr(formatted_data, "dict"):
+        return formatted_data.dict()
+    if isinstance(formatted_data, dict):
+        return formatted_data
+    return {"raw_text": str(formatted_data)}
+
 def save_formatted_data(unique_name: str, formatted_data):
     """
     Save formatted data to Supabase.
     Handles various data types including strings, dictionaries, and Pydantic models.
     """
     try:
-        if isinstance(formatted_data, str):
-            try:
-                data_json = json.loads(formatted_data)
-            except json.JSONDecodeError:
-                data_json = {"raw_text": formatted_data}
-        elif hasattr(formatted_data, "dict"):
-            data_json = formatted_data.dict()
-        elif isinstance(formatted_data, dict):
-            data_json = formatted_data
-        else:
-            data_json = {"raw_text": str(formatted_data)}
+        data_json = _formatted_data_json(formatted_data)
 
-        supabase.table("scraped_data").update({
+        get_supabase_client().table("scraped_data").update({
             "formatted_data": data_json
         }).eq("unique_name", unique_name).execute()
-        
-        MAGENTA = "\033[35m"
-        RESET = "\033[0m"  # Reset color to default
-        print(f"{MAGENTA}INFO:Scraped data saved for {unique_name}{RESET}")
+        logger.debug("Scraped data saved for %s", unique_name)
     except Exception as e:
-        print(f"\033[31mERROR:Failed to save formatted data for {unique_name}: {str(e)}{RESET}")
+        logger.error("Failed to save formatted data for %s: %s", unique_name, e)
 
-def extract_and_add_emails(unique_name: str, parsed_data: Dict[str, Any]) -> Dict[str, Any]:
+def _copy_formatted_data(items: List[Tuple[str, Any]]) -> bool:
+    """
+    Write formatted data through a direct Postgres connection: COPY all rows
+    into a temporary staging table, then apply them with one UPDATE ... FROM.
+    Returns False when no direct connection is available, so the caller can
+    fall back to the REST updates.
+    """
+    conn = get_postgres_connection()
+    if conn is None:
+        return False
+
+    # COPY text format: tab-separated columns, backslashes must be doubled.
+    # JSON encoding already escapes tabs and newlines inside strings.
+    buffer = io.StringIO()
+    for uniq, formatted_data in items:
+        data_text = orjson.dumps(_formatted_data_json(formatted_data), default=str).decode().replace("\\", "\\\\")
+        buffer.write(f"{uniq}\t{data_text}\n")
+    buffer.seek(0)
+
+    try:
+        with conn, conn.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE formatted_data_staging (unique_name TEXT, formatted_data JSONB) ON COMMIT DROP"
+            )
+            cursor.copy_expert("COPY formatted_data_staging (unique_name, formatted_data) FROM STDIN", buffer)
+            cursor.execute(
+                "UPDATE scraped_data AS s SET formatted_data = staging.formatted_data "
+                "FROM formatted_data_staging AS staging WHERE s.unique_name = staging.unique_name"
+            )
+    finally:
+        conn.close()
+    return True
+
+def save_formatted_data_bulk(items: List[Tuple[str, Any]]):
+    """
+    Save formatted data for many (unique_name, formatted_data) pairs.
+    Large batches use Postgres COPY when available. Otherwise, or when the
+    COPY fails, they are sent in one request (see bulk_update_scraped_data).
+    """
+    if not items:
+        return
+
+    if len(items) >= FORMATTED_DATA_COPY_THRESHOLD:
+        try:
+            if _copy_formatted_data(items):
+                logger.info("Scraped data saved for %d pages", len(items))
+                return
+        except Exception as e:
+            # The COPY runs in one transaction, so nothing was written; retry over REST
+            logger.warning("COPY of formatted data failed, falling back to REST: %s", e)
+
+    values = {uniq: _formatted_data_json(formatted_data) for uniq, formatted_data in items}
+    failed = bulk_update_scraped_data("formatted_data", values)
+    if failed:
+        logger.error("Failed to save formatted data for %d of %d pages: %s", len(failed), len(values), ", ".join(failed))
+    logger.info("Scraped data saved for %d pages", len(values) - len(failed))
+
+def _needs_email(listing) -> bool:
+    """True for a listing dict whose email is missing, empty or the LLM's "N/A"."""
+    return isinstance(listing, dict) and (not listing.get("email") or listing["email"] == "N/A")
+
+def fill_emails(parsed_data: Dict[str, Any], raw_html: str) -> Dict[str, Any]:
+    """
+    Give every listing in parsed_data that lacks an email the first address
+    found in raw_html. Pure CPU work: no database access and no JSON decoding,
+    so the caller must pass an already-normalized dict and the page's HTML.
+    Returns parsed_data, updated in place.
+    """
+    # Only listings without an email are enriched; when there are none, skip
+    # the HTML scan entirely
+    if not raw_html or not isinstance(parsed_data, dict) or not isinstance(parsed_data.get("listings"), list):
+        return parsed_data
+    listings_to_fill = [listing for listing in parsed_data["listings"] if _needs_email(listing)]
+    if not listings_to_fill:
+        return parsed_data
+    
+    # Only the first address is used, so stop scanning as soon as one is found
+    extracted_emails = extract_emails_from_html(raw_html, max_results=1)
+    
+    if extracted_emails:
+        # Every listing without a usable email gets the same fallback address
+        fallback_email = extracted_emails[0]
+        for listing in listings_to_fill:
+            listing["email"] = fallback_email
+    
+    return parsed_data
+
+def extract_and_add_emails(unique_name: str, parsed_data: Dict[str, Any], raw_data: Any = None) -> Dict[str, Any]:
     """
     Extract emails from the raw HTML content and add them to the parsed data.
+    Kept for callers that only have a unique_name; see fill_emails.
     
     Args:
         unique_name: The unique identifier for the scraped data
         parsed_data: The data parsed by the LLM
+        raw_data: The page's raw_data if the caller already has it;
+            otherwise it is read from supabase
         
     Returns:
         Updated parsed data with email addresses
@@ -86,77 +220,279 @@ def extract_and_add_emails(unique_name: str, parsed_data: Dict[str, Any]) -> Dic
     # If parsed_data is a string, try to parse it as JSON
     if isinstance(parsed_data, str):
         try:
-            parsed_data = json.loads(parsed_data)
-        except json.JSONDecodeError:
+            parsed_data = orjson.loads(parsed_data)
+        except orjson.JSONDecodeError:
             return parsed_data
     
-    raw_data = read_raw_data(unique_name)
-    if not raw_data:
+    # Skip the raw_data fetch when no listing needs an email
+    if not isinstance(parsed_data, dict) or not isinstance(parsed_data.get("listings"), list):
+        return parsed_data
+    if not any(_needs_email(listing) for listing in parsed_data["listings"]):
         return parsed_data
     
-    extracted_emails = extract_emails_from_html(raw_data)
-    
-    if extracted_emails and isinstance(parsed_data, dict) and "listings" in parsed_data:
-        for listing in parsed_data["listings"]:
-            if isinstance(listing, dict):
-                if "email" in listing and listing["email"] and listing["email"] != "N/A":
-                    continue
-                    
-                if extracted_emails:
-                    listing["email"] = extracted_emails[0]
-                else:
-                    listing["email"] = "N/A"
-    
-    return parsed_data
+    if raw_data is None:
+        raw_data = read_raw_data(unique_name)
+    return fill_emails(parsed_data, raw_data)
+
+def llm_cache_key(raw_data, fields: Tuple[str, ...], selected_model: str, system_message: str) -> str:
+    """
+    Key an LLM scrape response by the page content, the requested fields (in
+    order), the exact system message sent and the model, so any change to one
+    of them is a miss.
+    """
+    if isinstance(raw_data, str):
+        raw_bytes = raw_data.encode("utf-8")
+    else:
+        raw_bytes = orjson.dumps(raw_data, option=orjson.OPT_SORT_KEYS)
+    digest = hashlib.blake2b(digest_size=32)
+    for part in (raw_bytes, "\x1f".join(fields).encode("utf-8"), system_message.encode("utf-8"), selected_model.encode("utf-8")):
+        digest.update(part)
+        digest.update(b"\x1e")
+    return digest.hexdigest()
 
-def scrape_urls(unique_names: List[str], fields: List[str], selected_model: str):
+def read_cached_llm_responses(cache_keys: List[str]) -> Dict[str, Any]:
+    """
+    Fetch the cached LLM responses for many keys, SUPABASE_IN_BATCH_SIZE keys
+    per query. Returns a dict mapping key -> response for the usable hits.
+    Cache errors (e.g. the llm_cache table is missing) are treated as misses.
+    """
+    cached = {}
+    try:
+        for batch in in_batches(cache_keys):
+            response = get_supabase_client().table("llm_cache").select("key,response").in_("key", batch).execute()
+            cached.update((row["key"], row["response"]) for row in response.data or [] if _is_cacheable(row["response"]))
+    except Exception as e:
+        logger.warning("LLM cache lookup failed: %s", e)
+    return cached
+
+def save_cached_llm_response(cache_key: str, parsed, token_counts: Dict[str, int]):
+    """Store an LLM response in the llm_cache table; failures only skip caching."""
+    try:
+        get_supabase_client().table("llm_cache").upsert({
+            "key": cache_key,
+            "response": parsed,
+            "tokens": token_counts
+        }, on_conflict="key").execute()
+    except Exception as e:
+        logger.warning("Failed to cache LLM response: %s", e)
+
+def _is_cacheable(parsed) -> bool:
+    """
+    Only a listings container is worth caching. Anything else (the raw_text
+    fallback for non-JSON output, a truncated reply) is retried next run.
+    """
+    return isinstance(parsed, dict) and isinstance(parsed.get("listings"), list)
+
+def _decode_llm_output(parsed):
+    """Decode a string LLM output as JSON, keeping non-JSON text under raw_text."""
+    # If parsed is a string, try to parse it as JSON
+    if isinstance(parsed, str):
+        try:
+            parsed = orjson.loads(parsed)
+        except orjson.JSONDecodeError:
+            parsed = {"raw_text": parsed}
+    return parsed
+
+
+def _page_text(raw_data) -> str:
+    """raw_data as the text sent to the LLM (JSON-encoded when stored as an object)."""
+    return raw_data if isinstance(raw_data, str) else orjson.dumps(raw_data).decode()
+
+async def _scrape_async(unique_names: List[str], raw_by_name: Dict[str, Any], fields: Tuple[str, ...], listing_model, selected_model: str, concurrency: int = SCRAPE_LLM_CONCURRENCY, on_page_done: Optional[Callable[[str], None]] = None) -> List[Optional[tuple]]:
+    """
+    Parse and enrich every unique_name concurrently from the prefetched
+    raw_by_name mapping, with at most `concurrency` LLM calls in flight.
+    Pages whose (raw_data, fields, model) were already scraped reuse the cached
+    LLM response at zero token cost. Small pages are packed several to a call
+    (see pack_small_pages) and the shared usage is split between them.
+    Returns one (parsed, token_counts, cost) tuple per unique_name, in input order,
+    or None for pages that have no raw_data, no LLM output or failed (logged).
+    on_page_done, if given, is called with each unique_name as its page finishes.
+    """
+    sem = asyncio.Semaphore(concurrency)
+    response_format = create_listings_container_model(listing_model)
+    # Schema-aware system prompts, identical for every call so the provider can
+    # reuse its cached prefix across the batch
+    system_message = generate_system_message(listing_model)
+    batch_system_message = generate_batch_system_message(listing_model)
+    results: Dict[str, Optional[tuple]] = {}
+
+    def _page_done(uniq: str):
+        if on_page_done is not None:
+            on_page_done(uniq)
+
+    async def _finish(uniq: str, raw_data, parsed, token_counts: Dict[str, int], cost: float) -> tuple:
+        # raw_data is already prefetched and parsed is a decoded dict here,
+        # so only the CPU-bound enrichment runs off the event loop
+        parsed = await asyncio.to_thread(fill_emails, parsed, _page_text(raw_data))
+        return parsed, token_counts, cost
+
+    async def _scrape_single(uniq: str, raw_data, cache_key: str) -> Optional[tuple]:
+        async with sem:
+            parsed, token_counts, cost = await asyncio.to_thread(call_llm_model, raw_data, response_format, selected_model, system_message)
+        if not parsed:
+            return None
+        parsed = _decode_llm_output(parsed)
+        if _is_cacheable(parsed):
+            await asyncio.to_thread(save_cached_llm_response, cache_key, parsed, token_counts)
+        return await _finish(uniq, raw_data, parsed, token_counts, cost)
+
+    def _cache_keys(uniq: str) -> Optional[tuple]:
+        raw_data = raw_by_name.get(uniq)
+        if not raw_data:
+            logger.debug("No raw_data found for %s, skipping", uniq)
+            return None
+        page_text = _page_text(raw_data)
+        cache_key = llm_cache_key(raw_data, fields, selected_model, system_message)
+        batch_cache_key = None
+        if len(page_text) <= SCRAPE_SMALL_PAGE_CHARS:
+            # Small pages are normally answered by a packed call, which uses
+            # the batch prompt and is cached under its own key
+            batch_cache_key = llm_cache_key(raw_data, fields, selected_model, batch_system_message)
+        return raw_data, page_text, cache_key, batch_cache_key
+
+    async def _from_cache(uniq: str, raw_data, parsed):
+        try:
+            token_counts = {"input_tokens": 0, "output_tokens": 0, "cached_input_tokens": 0}
+            results[uniq] = await _finish(uniq, raw_data, parsed, token_counts, 0.0)
+        except Exception:
+            # A failed page is left out of the results instead of aborting the run
+            logger.exception("Scraping failed for %s", uniq)
+        finally:
+            _page_done(uniq)
+
+    async def _single(uniq: str, raw_data, cache_key: str):
+        try:
+            results[uniq] = await _scrape_single(uniq, raw_data, cache_key)
+        except Exception:
+            logger.exception("Scraping failed for %s", uniq)
+        finally:
+            _page_done(uniq)
+
+    async def _scrape_batch(batch: List[tuple]):
+        if len(batch) == 1:
+            uniq, raw_data, cache_key, _, _ = batch[0]
+            await _single(uniq, raw_data, cache_key)
+            return
+
+        pages_by_id = {f"p{i}": page for i, page in enumerate(batch, start=1)}
+        data = "\n\n".join(f"{PAGE_HEADER.format(page_id)}\n{page[-1]}" for page_id, page in pages_by_id.items())
+        try:
+            async with sem:
+                parsed, token_counts, cost = await asyncio.to_thread(call_llm_model, data, create_pages_container_model(listing_model), selected_model, batch_system_message)
+        except Exception:
+            # Every page of the failed call is retried on its own below
+            logger.exception("Packed scrape of %d pages failed", len(batch))
+            parsed, token_counts, cost = None, None, 0.0
+        parsed = _decode_llm_output(parsed) if parsed else {}
+
+        # Split the combined answer back into one listings container per page
+        listings_by_id = {}
+        for page in (parsed.get("pages") if isinstance(parsed, dict) else None) or []:
+            if isinstance(page, dict) and page.get("page_id") in pages_by_id:
+                listings_by_id.setdefault(page["page_id"], {"listings": page.get("listings") or []})
+
+        # A call that returned nothing usable was still billed, so its usage is
+        # split over the pages (and added to their retries) whenever it is known
+        shares = split_usage(token_counts, cost, len(batch)) if token_counts is not None else [None] * len(batch)
+
+        async def _split_one(page_id: str, page: tuple, share):
+            uniq, raw_data, cache_key, batch_cache_key, _ = page
+            try:
+                page_parsed = listings_by_id.get(page_id)
+                if page_parsed is None:
+                    # Missing from the combined answer: retry the page on its own
+                    results[uniq] = add_usage(await _scrape_single(uniq, raw_data, cache_key), share)
+                    return
+                page_counts, page_cost = share
+                await asyncio.to_thread(save_cached_llm_response, batch_cache_key, page_parsed, page_counts)
+                results[uniq] = await _finish(uniq, raw_data, page_parsed, page_counts, page_cost)
+            except Exception:
+                logger.exception("Scraping failed for %s", uniq)
+            finally:
+                _page_done(uniq)
+
+        await asyncio.gather(*(
+            _split_one(page_id, page, share)
+            for (page_id, page), share in zip(pages_by_id.items(), shares)
+        ), return_exceptions=True)
+
+    # Check the response cache for every page first (a few batched queries for
+    # the whole run), then run cache hits, large pages and packed groups of
+    # small pages concurrently
+    lookups = [_cache_keys(uniq) for uniq in unique_names]
+    all_keys = [key for lookup in lookups if lookup is not None for key in lookup[2:] if key is not None]
+    cached_by_key = await asyncio.to_thread(read_cached_llm_responses, all_keys)
+    tasks, small_pages = [], []
+    for uniq, lookup in zip(unique_names, lookups):
+        if lookup is None:
+            _page_done(uniq)
+            continue
+        raw_data, page_text, cache_key, batch_cache_key = lookup
+        cached = cached_by_key.get(cache_key, cached_by_key.get(batch_cache_key))
+        if cached is not None:
+            tasks.append(_from_cache(uniq, raw_data, cached))
+            continue
+        if batch_cache_key is not None:
+            small_pages.append((uniq, raw_data, cache_key, batch_cache_key, page_text))
+        else:
+            tasks.append(_single(uniq, raw_data, cache_key))
+    tasks.extend(_scrape_batch(batch) for batch in pack_small_pages(small_pages))
+    # Pages handle their own errors; this only keeps an unexpected one from
+    # cancelling the pages that are still running
+    for outcome in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(outcome, Exception):
+            logger.error("Scraping task failed: %s", outcome, exc_info=outcome)
+
+    return [results.get(uniq) for uniq in unique_names]
+
+def scrape_urls(unique_names: List[str], fields: List[str], selected_model: str, on_page_done: Optional[Callable[[str], None]] = None):
     """
     For each unique_name:
-      1) read raw_data from supabase
-      2) parse with selected LLM
+      1) read raw_data from supabase (one query for the whole batch)
+      2) parse with selected LLM (pages run concurrently; small pages share a call)
       3) extract emails from raw HTML
-      4) save formatted_data
+      4) save formatted_data (one batch at the end)
       5) accumulate cost
     Return total usage + list of final parsed data
+    on_page_done, if given, is called with each unique_name as its page finishes
+    (e.g. to report progress from a background thread).
     """
     total_input_tokens = 0
     total_output_tokens = 0
+    total_cached_input_tokens = 0
     total_cost = 0
     parsed_results = []
 
-    DynamicListingModel = create_dynamic_listing_model(fields)
-    DynamicListingsContainer = create_listings_container_model(DynamicListingModel)
+    # Models are cached per field set, so repeat runs skip pydantic class creation
+    schema_key = listing_schema_key(fields)
+    DynamicListingModel = _dynamic_listing_model(schema_key)
 
-    for uniq in unique_names:
-        raw_data = read_raw_data(uniq)
-        if not raw_data:
-            BLUE = "\033[34m"
-            RESET = "\033[0m"
-            print(f"{BLUE}No raw_data found for {uniq}, skipping.{RESET}")
+    # Fetch every page's raw_data in one query; it is shared by the LLM call
+    # and the email extraction
+    raw_by_name = read_raw_data_bulk(unique_names)
+
+    # Scrape all pages concurrently, then accumulate in the original order
+    results = asyncio.run(_scrape_async(unique_names, raw_by_name, schema_key, DynamicListingModel, selected_model, on_page_done=on_page_done))
+
+    for uniq, result in zip(unique_names, results):
+        if result is None:
             continue
+        parsed, token_counts, cost = result
 
-        parsed, token_counts, cost = call_llm_model(raw_data, DynamicListingsContainer, selected_model, SYSTEM_MESSAGE)
-        
-        if parsed:
-            # If parsed is a string, try to parse it as JSON
-            if isinstance(parsed, str):
-                try:
-                    parsed = json.loads(parsed)
-                except json.JSONDecodeError:
-                    parsed = {"raw_text": parsed}
-            
-            parsed = extract_and_add_emails(uniq, parsed)
-            save_formatted_data(uniq, parsed)
-
-            total_input_tokens += token_counts["input_tokens"]
-            total_output_tokens += token_counts["output_tokens"]
-            total_cost += cost
-            print(f"\033[32mScraping Cost for {uniq}: ${cost:.6f}\033[0m")
-            parsed_results.append({"unique_name": uniq, "parsed_data": parsed})
+        total_input_tokens += token_counts["input_tokens"]
+        total_output_tokens += token_counts["output_tokens"]
+        total_cached_input_tokens += token_counts.get("cached_input_tokens", 0)
+        total_cost += cost
+        logger.debug("Scraping cost for %s: $%.6f", uniq, cost)
+        parsed_results.append({"unique_name": uniq, "parsed_data": parsed})
+    
+    # Store every page's formatted data in one batch
+    save_formatted_data_bulk([(item["unique_name"], item["parsed_data"]) for item in parsed_results])
     
-    print(f"\033[33m=== Scraping Summary ===\033[0m")
-    print(f"\033[33mTotal Input Tokens: {total_input_tokens}\033[0m")
-    print(f"\033[33mTotal Output Tokens: {total_output_tokens}\033[0m")
-    print(f"\033[33mTotal Scraping Cost: ${total_cost:.6f}\033[0m")
+    logger.info(
+        "Scraping summary: input tokens=%d (cached %d) output tokens=%d cost=$%.6f",
+        total_input_tokens, total_cached_input_tokens, total_output_tokens, total_cost,
+    )
 
     return total_input_tokens, total_output_tokens, total_cost, parsed_results
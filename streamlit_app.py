@@ -3,12 +3,19 @@
 import streamlit as st
 from streamlit_tags import st_tags_sidebar
 import pandas as pd
-import json
+import orjson
 import re
 import sys
 import asyncio
+import html
+import logging
+import queue
 import subprocess
+import time
 import os
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import BaseModel
 # ---local imports---
 from scraper import scrape_urls
 from pagination import paginate_urls
@@ -16,23 +23,239 @@ from markdown import fetch_and_store_markdowns
 from assets import MODELS_USED, OPENAI_MODEL_FULLNAME
 from api_management import get_supabase_client
 
+# Run summaries go through logging; httpx would otherwise log every Supabase
+# and LLM request at INFO
+logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:%(message)s")
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
 # Only use WindowsProactorEventLoopPolicy on Windows
 if sys.platform.startswith("win"):
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
+# Style for the "bubble" used to show each added URL in the sidebar, sent once
+# per render so each bubble only carries its class name
+URL_BUBBLE_CSS = (
+    "<style>.url-bubble {"
+    "background-color: #E6F9F3;"  # Very Light Mint for contrast
+    "color: #0074D9;"            # Bright Blue for link-like appearance
+    "border-radius: 15px;"       # Slightly larger radius for smoother edges
+    "padding: 8px 12px;"         # Increased padding for better spacing
+    "margin: 5px;"               # Space between bubbles
+    "display: inline-block;"     # Ensures proper alignment
+    "text-decoration: none;"     # Removes underline if URLs are clickable
+    "font-weight: bold;"         # Makes text stand out
+    "font-family: Arial, sans-serif;"  # Clean and modern font
+    "box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);"  # Subtle shadow for depth
+    "}</style>"
+)
+URL_BUBBLE_TEMPLATE = "<span class='url-bubble'>{}</span>"
+
+# One URL per whitespace-separated token pasted into the sidebar text area
+URL_TOKEN_RE = re.compile(r"\S+")
+
+# Seconds between checks on the background scraping job
+SCRAPE_POLL_INTERVAL = 0.5
+
+@st.cache_resource
+def get_scrape_executor():
+    """Thread pool shared by all sessions for running scraping jobs off the script thread."""
+    return ThreadPoolExecutor(max_workers=4)
+
+def run_scrape_pipeline(urls, fields, show_tags, use_pagination, pagination_details,
+                        start_page, end_page, on_page_done=None, on_message=None):
+    """
+    Fetch the markdown for the launched URLs, run scraping and pagination on
+    it and return the results dict stored in session state. Runs in a worker
+    thread, so it must not call Streamlit UI functions; progress is reported
+    through on_page_done and user-facing (level, message) pairs through on_message.
+    """
+    total_input_tokens = 0
+    total_output_tokens = 0
+    total_cost = 0
+    
+    # 0) Fetch or reuse the markdown for each URL
+    unique_names = fetch_and_store_markdowns(urls, on_message)
+    
+    # 1) Scraping logic
+    all_data = []
+    if show_tags:
+        in_tokens_s, out_tokens_s, cost_s, parsed_data = scrape_urls(unique_names,fields,OPENAI_MODEL_FULLNAME,on_page_done=on_page_done)
+        total_input_tokens += in_tokens_s
+        total_output_tokens += out_tokens_s
+        total_cost += cost_s
+
+        # Store or display parsed data 
+        all_data = parsed_data # or rename to something consistent
+    # 2) Pagination logic
+    pagination_info = None
+    pagination_data = None
+    if use_pagination:
+        in_tokens_p, out_tokens_p, cost_p, pagination_results = paginate_urls(
+            unique_names, 
+            OPENAI_MODEL_FULLNAME,
+            pagination_details,
+            urls,
+            fields if show_tags else None,
+            auto_scrape_pages=True,
+            start_page=start_page,
+            end_page=end_page,
+            on_message=on_message
+        )
+        total_input_tokens += in_tokens_p
+        total_output_tokens += out_tokens_p
+        total_cost += cost_p
+
+        # Store pagination information and paginated data
+        pagination_info = pagination_results.get('pagination_info', [])
+        pagination_data = pagination_results.get('paginated_data', [])
+        
+        # Merge paginated data with regular data if available
+        if pagination_data and show_tags:
+            all_data.extend(pagination_data)
+    
+    # Log combined total cost
+    logger.info("Combined total: input tokens=%d output tokens=%d cost=$%.6f", total_input_tokens, total_output_tokens, total_cost)
+    
+    # 3) Everything that goes into session state
+    return {
+        'data': all_data,
+        'input_tokens': total_input_tokens,
+        'output_tokens': total_output_tokens,
+        'total_cost': total_cost,
+        'pagination_info': pagination_info,
+        'pagination_data': pagination_data
+    }
+
+def iter_result_rows(all_data):
+    """
+    Yield one table row per listing (or one per item without listings) from the
+    scraping results. Each item's parsed_data is normalized once, in place, and
+    every row gets a human-readable data_source ("Main URL" or "Pagination").
+    """
+    for data_item in all_data:
+        # Usually data_item is something like:
+        # {"unique_name": "...", "parsed_data": DynamicListingsContainer(...) or dict or str}
+
+        # 1) Ensure data_item is a dict
+        if not isinstance(data_item, dict):
+            st.error(f"data_item is not a dict, skipping. Type: {type(data_item)}")
+            continue
+
+        # 2) If "parsed_data" is present and might be a Pydantic model or something
+        if "parsed_data" in data_item:
+            parsed_obj = data_item["parsed_data"]
+
+            # Convert if it's a Pydantic model (dumped once, cached below)
+            if isinstance(parsed_obj, BaseModel):
+                parsed_obj = parsed_obj.model_dump()
+            elif isinstance(parsed_obj, str):
+                # If it's a JSON string, attempt to parse
+                try:
+                    parsed_obj = orjson.loads(parsed_obj)
+                except orjson.JSONDecodeError:
+                    # fallback: just keep as raw string
+                    pass
+
+            # Now we have "parsed_obj" as a dict, list, or string
+            data_item["parsed_data"] = parsed_obj
+
+        # The pagination flag lives on the item, so carry it onto its listing rows
+        data_source = "Pagination" if data_item.get("pagination_source") else "Main URL"
+
+        # 3) If the "parsed_data" has a 'listings' key that is a list of items,
+        #    treat them as multiple rows. Otherwise, the entire data_item is a single row.
+        try:
+            pd_obj = data_item["parsed_data"]
+            if isinstance(pd_obj, dict) and isinstance(pd_obj.get("listings"), list):
+                # Shallow copies so we don't mutate the listings
+                rows = [dict(listing) for listing in pd_obj["listings"]]
+            else:
+                rows = [dict(data_item)]
+        except (TypeError, KeyError, ValueError) as e:
+            # Handle the case where data_item doesn't have "parsed_data" or a listing isn't a mapping
+            st.error(f"Error processing data item: {str(e)}")
+            continue
+
+        for row in rows:
+            row["data_source"] = data_source
+            yield row
+
+def normalize_pagination_data(pag_obj):
+    """Pagination data as a plain dict (Pydantic models dumped, JSON strings parsed)."""
+    # Convert if it's a Pydantic model
+    if isinstance(pag_obj, BaseModel):
+        return pag_obj.model_dump()
+    if isinstance(pag_obj, str):
+        # If it's a JSON string, attempt to parse
+        try:
+            return orjson.loads(pag_obj)
+        except orjson.JSONDecodeError:
+            return {"error": "Could not parse pagination data"}
+    return pag_obj
+
+def _json_default(obj):
+    """Serialize Pydantic models (and anything else orjson can't) for the JSON download."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    return str(obj)
+
+def playwright_browsers_dir():
+    """
+    Directory Playwright downloads its browsers into, or None when
+    PLAYWRIGHT_BROWSERS_PATH=0 keeps them inside the package.
+    """
+    custom_path = os.environ.get("PLAYWRIGHT_BROWSERS_PATH")
+    if custom_path == "0":
+        return None
+    if custom_path:
+        return pathlib.Path(custom_path)
+    if sys.platform.startswith("win"):
+        return pathlib.Path(os.environ.get("LOCALAPPDATA", pathlib.Path.home() / "AppData" / "Local")) / "ms-playwright"
+    if sys.platform == "darwin":
+        return pathlib.Path.home() / "Library" / "Caches" / "ms-playwright"
+    return pathlib.Path(os.environ.get("XDG_CACHE_HOME", pathlib.Path.home() / ".cache")) / "ms-playwright"
+
+@st.cache_resource(show_spinner=False)
+def _playwright_probe_state():
+    """Process-wide holder for a successful browser probe."""
+    return {"installed": False}
+
+def playwright_browsers_installed():
+    """
+    Check for installed Playwright browsers, remembering only a positive answer
+    for the rest of the process. A missing install (or a failed probe) is
+    checked again on the next rerun, so installing from a terminal is picked up
+    without restarting the app.
+    """
+    state = _playwright_probe_state()
+    if state["installed"]:
+        return True
+
+    # Playwright drops this marker once a browser download has finished, so an
+    # existing Chromium install is found without spawning the CLI
+    browsers_dir = playwright_browsers_dir()
+    if browsers_dir is not None and any(browsers_dir.glob("chromium-*/INSTALLATION_COMPLETE")):
+        state["installed"] = True
+        return True
+
+    # Fall back to a simple Playwright command to check if browsers are installed
+    result = subprocess.run(
+        ["playwright", "install", "--help"],
+        capture_output=True,
+        text=True,
+        check=False  # Don't raise an exception if it fails
+    )
+    
+    # If the command fails or contains an error about browser installation
+    installed = result.returncode == 0 and "Looks like Playwright was just installed" not in result.stderr
+    state["installed"] = installed
+    return installed
+
 def check_playwright_installed():
     """Check if Playwright browsers are installed and install if missing"""
     try:
-        # Try to run a simple Playwright command to check if browsers are installed
-        result = subprocess.run(
-            ["playwright", "install", "--help"],
-            capture_output=True,
-            text=True,
-            check=False  # Don't raise an exception if it fails
-        )
-        
-        # If the command fails or contains an error about browser installation
-        if result.returncode != 0 or "Looks like Playwright was just installed" in result.stderr:
+        if not playwright_browsers_installed():
             st.warning("⚠️ Playwright browsers are not installed. These are required for web scraping.")
             
             install_col1, install_col2 = st.columns(2)
@@ -142,9 +365,10 @@ def install_playwright():
             )
             st.success("Playwright installed! Now installing browsers...")
             
-            # Try installing browsers after installing playwright
+            # Try installing browsers after installing playwright; run it as a
+            # module since the freshly installed CLI may not be on PATH yet
             subprocess.run(
-                ["playwright", "install", "chromium"],
+                [sys.executable, "-m", "playwright", "install", "chromium"],
                 capture_output=True,
                 text=True,
                 check=True
@@ -232,6 +456,12 @@ if 'results' not in st.session_state:
     st.session_state['results'] = None
 if 'driver' not in st.session_state:
     st.session_state['driver'] = None
+if 'scrape_future' not in st.session_state:
+    st.session_state['scrape_future'] = None
+if 'result_rows' not in st.session_state:
+    st.session_state['result_rows'] = None  # (rows, DataFrame) built from 'results', once per run
+if 'result_downloads' not in st.session_state:
+    st.session_state['result_downloads'] = None  # (JSON, CSV) download payloads for 'results'
 
 # Sidebar components
 st.sidebar.title("Web Scraper Settings")
@@ -255,9 +485,9 @@ with st.sidebar.container():
     with col2:
         if st.button("Add URLs"):
             if url_text.strip():
-                new_urls = re.split(r"\s+", url_text.strip())
-                new_urls = [u for u in new_urls if u]
-                st.session_state["urls_splitted"].extend(new_urls)
+                new_urls = URL_TOKEN_RE.findall(url_text)
+                # Drop repeats (pasted or already added) while keeping their order
+                st.session_state["urls_splitted"] = list(dict.fromkeys(st.session_state["urls_splitted"] + new_urls))
                 st.session_state["text_temp"] = ""
                 st.rerun()
         if st.button("Clear URLs"):
@@ -267,22 +497,11 @@ with st.sidebar.container():
     # Show the URLs in an expander, each as a styled "bubble"
     with st.expander("Added URLs", expanded=True):
         if st.session_state["urls_splitted"]:
-            bubble_html = ""
-            for url in st.session_state["urls_splitted"]:
-                bubble_html += (
-                    f"<span style='"
-                    f"background-color: #E6F9F3;"  # Very Light Mint for contrast
-                    f"color: #0074D9;"            # Bright Blue for link-like appearance
-                    f"border-radius: 15px;"       # Slightly larger radius for smoother edges
-                    f"padding: 8px 12px;"         # Increased padding for better spacing
-                    f"margin: 5px;"               # Space between bubbles
-                    f"display: inline-block;"     # Ensures proper alignment
-                    f"text-decoration: none;"     # Removes underline if URLs are clickable
-                    f"font-weight: bold;"         # Makes text stand out
-                    f"font-family: Arial, sans-serif;"  # Clean and modern font
-                    f"box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);'"  # Subtle shadow for depth
-                    f">{url}</span>"
-                )
+            # Join once instead of growing a string per URL; escape so a pasted
+            # URL can't inject markup into the page
+            bubble_html = URL_BUBBLE_CSS + "".join(
+                URL_BUBBLE_TEMPLATE.format(html.escape(url)) for url in st.session_state["urls_splitted"]
+            )
             st.markdown(bubble_html, unsafe_allow_html=True)
         else:
             st.write("No URLs added yet.")
@@ -303,25 +522,38 @@ pagination_details = ""
 start_page = 1
 end_page = 1
 
+# Free text stays outside the form: Enter in a form's text input submits it,
+# which would launch a paid scrape halfway through typing
 if use_pagination:
     pagination_details = st.sidebar.text_input("Enter Pagination Details (optional)",help="Describe how to navigate through pages (e.g., 'Next' button class, URL pattern)")
-    col1, col2 = st.sidebar.columns(2)
-    with col1:
-        start_page = st.number_input("Start Page", min_value=1, value=1, step=1, 
-                                     help="The first page number to scrape (inclusive)")
-    with col2:
-        end_page = st.number_input("End Page", min_value=1, value=1, step=1,
-                                  help="The last page number to scrape (inclusive)")
-    
-    st.sidebar.info("The scraper will detect pagination links and only process pages in the specified range.")
-        
-st.sidebar.markdown("---")
-
-
 
-# Main action button
-if st.sidebar.button("LAUNCH", type="primary"):
-    if st.session_state["urls_splitted"] == []:
+# The page range and LAUNCH share a form, so editing them doesn't rerun the
+# script until LAUNCH is pressed. The toggles stay outside since they decide
+# which inputs are shown.
+with st.sidebar.form("scrape_config", border=False):
+    if use_pagination:
+        col1, col2 = st.columns(2)
+        with col1:
+            start_page = st.number_input("Start Page", min_value=1, value=1, step=1, 
+                                         help="The first page number to scrape (inclusive)")
+        with col2:
+            end_page = st.number_input("End Page", min_value=1, value=1, step=1,
+                                      help="The last page number to scrape (inclusive)")
+        
+        st.info("The scraper will detect pagination links and only process pages in the specified range.")
+            
+    st.markdown("---")
+
+    # Main action button
+    launch = st.form_submit_button("LAUNCH", type="primary")
+
+if launch:
+    running_future = st.session_state.get('scrape_future')
+    if running_future is not None and not running_future.done():
+        # The worker can't be cancelled; launching again would run a second
+        # job next to it and lose track of the first one's results
+        st.warning("A scrape is already running. Please wait for it to finish before launching again.")
+    elif st.session_state["urls_splitted"] == []:
         st.error("Please enter at least one URL.")
     elif show_tags and len(fields) == 0:
         st.error("Please enter at least one field to extract.")
@@ -333,78 +565,65 @@ if st.sidebar.button("LAUNCH", type="primary"):
         st.session_state['pagination_details'] = pagination_details
         st.session_state['start_page'] = start_page
         st.session_state['end_page'] = end_page
-        
-        # fetch or reuse the markdown for each URL
-        unique_names = fetch_and_store_markdowns(st.session_state["urls_splitted"])
-        st.session_state["unique_names"] = unique_names
 
-        # Move on to "scraping" step
+        # Move on to "scraping" step with a fresh background job
+        st.session_state['scrape_future'] = None
         st.session_state['scraping_state'] = 'scraping'
 
 
 
 if st.session_state['scraping_state'] == 'scraping':
-    try:
-        with st.spinner("Processing..."):
-            unique_names = st.session_state["unique_names"]  # from the LAUNCH step
-
-            total_input_tokens = 0
-            total_output_tokens = 0
-            total_cost = 0
-            
-            # 1) Scraping logic
-            all_data = []
-            if show_tags:
-                in_tokens_s, out_tokens_s, cost_s, parsed_data = scrape_urls(unique_names,st.session_state['fields'],OPENAI_MODEL_FULLNAME)
-                total_input_tokens += in_tokens_s
-                total_output_tokens += out_tokens_s
-                total_cost += cost_s
-
-                # Store or display parsed data 
-                all_data = parsed_data # or rename to something consistent
-            # 2) Pagination logic
-            pagination_info = None
-            pagination_data = None
-            if st.session_state['use_pagination']:
-                in_tokens_p, out_tokens_p, cost_p, pagination_results = paginate_urls(
-                    unique_names, 
-                    OPENAI_MODEL_FULLNAME,
-                    st.session_state['pagination_details'],
-                    st.session_state["urls_splitted"],
-                    fields if show_tags else None,
-                    auto_scrape_pages=True,
-                    start_page=st.session_state['start_page'],
-                    end_page=st.session_state['end_page']
-                )
-                total_input_tokens += in_tokens_p
-                total_output_tokens += out_tokens_p
-                total_cost += cost_p
+    # Submit the pipeline once; reruns (e.g. any widget interaction while it
+    # runs) pick up the same future from session state instead of resubmitting
+    if st.session_state.get('scrape_future') is None:
+        progress_queue = queue.Queue()
+        message_queue = queue.Queue()
+        st.session_state['scrape_progress_queue'] = progress_queue
+        st.session_state['scrape_message_queue'] = message_queue
+        st.session_state['scrape_pages_done'] = 0
+        st.session_state['scrape_future'] = get_scrape_executor().submit(
+            run_scrape_pipeline,
+            st.session_state['urls'],
+            st.session_state['fields'],
+            show_tags,
+            st.session_state['use_pagination'],
+            st.session_state['pagination_details'],
+            st.session_state['start_page'],
+            st.session_state['end_page'],
+            progress_queue.put,
+            lambda level, message: message_queue.put((level, message))
+        )
 
-                # Store pagination information and paginated data
-                pagination_info = pagination_results.get('pagination_info', [])
-                pagination_data = pagination_results.get('paginated_data', [])
-                
-                # Merge paginated data with regular data if available
-                if pagination_data and show_tags:
-                    all_data.extend(pagination_data)
-                    
-            # 3) Save everything in session state
-            st.session_state['results'] = {
-                'data': all_data,
-                'input_tokens': total_input_tokens,
-                'output_tokens': total_output_tokens,
-                'total_cost': total_cost,
-                'pagination_info': pagination_info,
-                'pagination_data': pagination_data
-            }
-            
-            # Print combined total cost
-            print(f"\033[1;33m=== COMBINED TOTAL SUMMARY ===\033[0m")
-            print(f"\033[1;33mTotal Input Tokens: {total_input_tokens}\033[0m")
-            print(f"\033[1;33mTotal Output Tokens: {total_output_tokens}\033[0m")
-            print(f"\033[1;33mTotal Combined Cost: ${total_cost:.6f}\033[0m")
-            
-            st.session_state['scraping_state'] = 'completed'
+    future = st.session_state['scrape_future']
+    progress_queue = st.session_state['scrape_progress_queue']
+    message_queue = st.session_state['scrape_message_queue']
+    # One unique_name (and so one scraped page) per launched URL
+    total_pages = max(len(st.session_state['urls']), 1)
+
+    with st.status("Processing...", expanded=True) as status:
+        progress_bar = st.progress(0.0)
+        # Poll the worker so the script thread stays free to handle reruns
+        while True:
+            # Read done before draining so nothing queued at the very end is missed
+            finished = future.done()
+            while not progress_queue.empty():
+                st.session_state['scrape_pages_done'] += 1
+                status.write(f"Scraped {progress_queue.get()}")
+            # Errors and warnings raised in the worker are shown from here
+            while not message_queue.empty():
+                level, message = message_queue.get()
+                getattr(st, level)(message)
+            progress_bar.progress(min(st.session_state['scrape_pages_done'] / total_pages, 1.0))
+            if finished:
+                break
+            time.sleep(SCRAPE_POLL_INTERVAL)
+
+    st.session_state['scrape_future'] = None
+    try:
+        st.session_state['results'] = future.result()
+        st.session_state['result_rows'] = None
+        st.session_state['result_downloads'] = None
+        st.session_state['scraping_state'] = 'completed'
     except Exception as e:
         # Display the error message.
         st.error(f"An error occurred during scraping: {e}")
@@ -413,8 +632,12 @@ if st.session_state['scraping_state'] == 'scraping':
         st.session_state['scraping_state'] = 'idle'
 
 # Display results
-if st.session_state['scraping_state'] == 'completed' and st.session_state['results']:
-    results = st.session_state['results']
+@st.fragment
+def render_results(results):
+    """
+    Render the results table, downloads and pagination analysis. As a fragment,
+    interactions inside it (e.g. a download click) rerun only this section.
+    """
     all_data = results['data']
     total_input_tokens = results['input_tokens']
     total_output_tokens = results['output_tokens']
@@ -428,87 +651,27 @@ if st.session_state['scraping_state'] == 'completed' and st.session_state['resul
     if show_tags:
         st.subheader("Scraping Results")
 
-        # We'll accumulate all rows in this list
-        all_rows = []
-
-        # Loop over each data item in the "all_data" list
-        for i, data_item in enumerate(all_data, start=1):
-
-            # Usually data_item is something like:
-            # {"unique_name": "...", "parsed_data": DynamicListingsContainer(...) or dict or str}
-
-            # 1) Ensure data_item is a dict
-            if not isinstance(data_item, dict):
-                st.error(f"data_item is not a dict, skipping. Type: {type(data_item)}")
-                continue
-
-            # 2) If "parsed_data" is present and might be a Pydantic model or something
-            if "parsed_data" in data_item:
-                parsed_obj = data_item["parsed_data"]
-
-                # Convert if it's a Pydantic model
-                if hasattr(parsed_obj, "dict"):
-                    parsed_obj = parsed_obj.model_dump()
-                elif isinstance(parsed_obj, str):
-                    # If it's a JSON string, attempt to parse
-                    try:
-                        parsed_obj = json.loads(parsed_obj)
-                    except json.JSONDecodeError:
-                        # fallback: just keep as raw string
-                        pass
-
-                # Now we have "parsed_obj" as a dict, list, or string
-                data_item["parsed_data"] = parsed_obj
-
-            # 3) If the "parsed_data" has a 'listings' key that is a list of items,
-            #    we might want to treat them as multiple rows. 
-            #    Otherwise, we treat the entire data_item as a single row.
-
-            try:
-                pd_obj = data_item["parsed_data"]
-                
-                # If pd_obj is a string, try to parse it as JSON
-                if isinstance(pd_obj, str):
-                    try:
-                        pd_obj = json.loads(pd_obj)
-                        # Update the parsed_data with the parsed JSON
-                        data_item["parsed_data"] = pd_obj
-                    except json.JSONDecodeError:
-                        # Can't parse as JSON, keep as string
-                        pass
-                
-                # If it has 'listings' in parsed_data
-                if isinstance(pd_obj, dict) and "listings" in pd_obj and isinstance(pd_obj["listings"], list):
-                    # We'll create one row per listing, plus carry over "unique_name" or other fields
-                    for listing in pd_obj["listings"]:
-                        # Make a shallow copy so we don't mutate 'listing'
-                        row_dict = dict(listing)
-                        # You can also attach the unique_name or other top-level fields:
-                        # row_dict["unique_name"] = data_item.get("unique_name", "")
-                        all_rows.append(row_dict)
-                else:
-                    # We'll just store the entire item as one row
-                    # Possibly flatten parsed_data => just store it as "parsed_data" field
-                    # e.g. if parsed_obj is a dict, embed it. Or keep it as string
-                    row_dict = dict(data_item)  # shallow copy
-                    all_rows.append(row_dict)
-            except (TypeError, KeyError) as e:
-                # Handle the case where data_item is not a dict or doesn't have "parsed_data"
-                st.error(f"Error processing data item: {str(e)}")
-                continue
-
-        # For each item in parsed_data, convert the pagination_source flag to a human-readable indicator
-        for row in all_rows:
-            if "pagination_source" in row:
-                row["data_source"] = "Pagination" if row["pagination_source"] else "Main URL"
-            else:
-                row["data_source"] = "Main URL"
+        # Normalize every result into table rows in a single pass, once per
+        # run rather than on every rerun; the same rows (and DataFrame) back
+        # both the table and the CSV download
+        if st.session_state['result_rows'] is None:
+            rows = list(iter_result_rows(all_data))
+            # After collecting all rows from all_data, create one DataFrame
+            df = None
+            if rows:
+                try:
+                    # Typed columns (instead of object) convert to Arrow without
+                    # a per-cell pass when st.dataframe ships them to the browser
+                    df = pd.DataFrame(rows).convert_dtypes()
+                    df["data_source"] = pd.Categorical(df["data_source"], categories=["Main URL", "Pagination"])
+                except (ValueError, TypeError) as e:
+                    st.error(f"Error creating DataFrame: {str(e)}")
+            st.session_state['result_rows'] = (rows, df)
+        all_rows, df = st.session_state['result_rows']
 
-        # After collecting all rows from all_data in "all_rows", create one DataFrame
         if not all_rows:
             st.warning("No data rows to display.")
-        else:
-            df = pd.DataFrame(all_rows)
+        if df is not None:
             
             # Configure the data_source column to be displayed with color indicators
             st.dataframe(
@@ -523,8 +686,8 @@ if st.session_state['scraping_state'] == 'completed' and st.session_state['resul
             )
 
             # Add information about data sources
-            if any("pagination_source" in row for row in all_rows):
-                num_pagination_rows = sum(1 for row in all_rows if row.get("pagination_source", False))
+            num_pagination_rows = sum(1 for row in all_rows if row["data_source"] == "Pagination")
+            if num_pagination_rows:
                 num_regular_rows = len(all_rows) - num_pagination_rows
                 
                 st.info(f"Data includes {num_regular_rows} entries from main URLs and {num_pagination_rows} entries from pagination.")
@@ -532,50 +695,20 @@ if st.session_state['scraping_state'] == 'completed' and st.session_state['resul
         # Download options
         st.subheader("Download Extracted Data")
         col1, col2 = st.columns(2)
+        # Serialize the payloads once per run; reruns hand the same bytes back
+        if st.session_state['result_downloads'] is None:
+            json_data = orjson.dumps(all_data, default=_json_default, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            # Reuse the DataFrame already built for the results table
+            csv_data = (df if df is not None else pd.DataFrame()).to_csv(index=False)
+            st.session_state['result_downloads'] = (json_data, csv_data)
+        json_data, csv_data = st.session_state['result_downloads']
         with col1:
-            json_data = json.dumps(all_data, default=lambda o: o.dict() if hasattr(o, 'dict') else str(o), indent=4)
             st.download_button("Download JSON",data=json_data,file_name="scraped_data.json")
         with col2:
-            # Convert all data to a single DataFrame
-            all_listings = []
-            for data in all_data:
-                try:
-                    if isinstance(data, str):
-                        try:
-                            data = json.loads(data)
-                        except json.JSONDecodeError:
-                            continue
-                    
-                    if isinstance(data, dict):
-                        if 'listings' in data and isinstance(data['listings'], list):
-                            all_listings.extend(data['listings'])
-                        else:
-                            # If no listings found but it's a dict, add it as a row
-                            all_listings.append(data)
-                    elif hasattr(data, 'listings') and hasattr(data.listings, '__iter__'):
-                        try:
-                            all_listings.extend([item.dict() if hasattr(item, 'dict') else item for item in data.listings])
-                        except AttributeError:
-                            # If we can't get dict() but it's iterable, add as is
-                            all_listings.extend(list(data.listings))
-                    else:
-                        all_listings.append(data)
-                except (TypeError, AttributeError) as e:
-                    st.error(f"Error processing data for download: {str(e)}")
-                    continue
-            
-            # Handle empty listings gracefully
-            if not all_listings:
+            if df is None:
                 st.warning("No data available for CSV download")
-                combined_df = pd.DataFrame()
-            else:
-                try:
-                    combined_df = pd.DataFrame(all_listings)
-                except (ValueError, TypeError) as e:
-                    st.error(f"Error creating DataFrame: {str(e)}")
-                    combined_df = pd.DataFrame()
             
-            st.download_button("Download CSV",data=combined_df.to_csv(index=False),file_name="scraped_data.csv")
+            st.download_button("Download CSV",data=csv_data,file_name="scraped_data.csv")
 
         st.success(f"Scraping completed. Results saved in database")
 
@@ -587,17 +720,8 @@ if st.session_state['scraping_state'] == 'completed' and st.session_state['resul
         total_pagination_urls = 0
         for item in pagination_info:
             if "pagination_data" in item:
-                pag_obj = item["pagination_data"]
-
-                # Convert if it's a Pydantic model
-                if hasattr(pag_obj, "dict"):
-                    pag_obj = pag_obj.model_dump()
-                elif isinstance(pag_obj, str):
-                    # If it's a JSON string, attempt to parse
-                    try:
-                        pag_obj = json.loads(pag_obj)
-                    except json.JSONDecodeError:
-                        pag_obj = {"error": "Could not parse pagination data"}
+                # Normalized in place, so the listing below and later reruns reuse it
+                pag_obj = item["pagination_data"] = normalize_pagination_data(item["pagination_data"])
                 
                 # Count pagination URLs
                 if isinstance(pag_obj, dict) and "page_urls" in pag_obj and isinstance(pag_obj["page_urls"], list):
@@ -617,14 +741,6 @@ if st.session_state['scraping_state'] == 'completed' and st.session_state['resul
                     st.markdown(f"**Source**: {item['unique_name']}")
                     
                     pag_obj = item["pagination_data"]
-                    # Convert if needed
-                    if hasattr(pag_obj, "dict"):
-                        pag_obj = pag_obj.model_dump()
-                    elif isinstance(pag_obj, str):
-                        try:
-                            pag_obj = json.loads(pag_obj)
-                        except json.JSONDecodeError:
-                            pag_obj = {"error": "Could not parse pagination data"}
                     
                     # Display URLs
                     if isinstance(pag_obj, dict) and "page_urls" in pag_obj and isinstance(pag_obj["page_urls"], list):
@@ -639,8 +755,14 @@ if st.session_state['scraping_state'] == 'completed' and st.session_state['resul
                         st.write("No valid pagination data")
                     
                     st.markdown("---")
-    # Reset scraping state
+
+if st.session_state['scraping_state'] == 'completed' and st.session_state['results']:
+    render_results(st.session_state['results'])
+
+    # Reset scraping state (fragments can't write to the sidebar, so this stays outside)
     if st.sidebar.button("Clear Results"):
         st.session_state['scraping_state'] = 'idle'
         st.session_state['results'] = None
+        st.session_state['result_rows'] = None
+        st.session_state['result_downloads'] = None
 
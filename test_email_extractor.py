@@ -3,6 +3,7 @@ Unit tests for the email_extractor module
 """
 
 import unittest
+from bs4 import BeautifulSoup
 from email_extractor import (
     extract_emails_from_html,
     _extract_emails_with_regex,
@@ -41,6 +42,72 @@ class TestEmailExtractor(unittest.TestCase):
         emails = extract_emails_from_html(html)
         self.assertIn("john@example.com", emails)
         
+    def test_alternate_at_entity_extraction(self):
+        """Test extraction of emails with hex and named entities for @."""
+        html = """
+        <p>Write to jane&#x40;example.com or lab&commat;example.org.</p>
+        """
+        emails = extract_emails_from_html(html)
+        self.assertIn("jane@example.com", emails)
+        self.assertIn("lab@example.org", emails)
+        
+    def test_fully_entity_encoded_extraction(self):
+        """Test extraction of addresses written entirely as character references."""
+        html = """
+        <p>&#106;&#111;&#104;&#110;&#64;&#101;&#120;&#97;&#109;&#112;&#108;&#101;&#46;&#99;&#111;&#109;</p>
+        """
+        emails = extract_emails_from_html(html)
+        self.assertIn("john@example.com", emails)
+        
+    def test_encoded_dot_extraction(self):
+        """Test extraction of addresses with an entity-encoded dot in the domain."""
+        html = """
+        <p>Contact: jane&#64;example&#46;com</p>
+        """
+        emails = extract_emails_from_html(html)
+        self.assertIn("jane@example.com", emails)
+        
+    def test_zero_padded_entity_extraction(self):
+        """Test extraction of addresses with a zero-padded &#0064; entity."""
+        html = """
+        <p>Contact: lab&#0064;example.org</p>
+        """
+        emails = extract_emails_from_html(html)
+        self.assertIn("lab@example.org", emails)
+        
+    def test_unterminated_numeric_entity_extraction(self):
+        """Test extraction of addresses with numeric entities missing their ';'."""
+        html = """
+        <p>Contact: user&#64example.com or lab&#x40mail.org</p>
+        """
+        emails = extract_emails_from_html(html)
+        self.assertIn("user@example.com", emails)
+        self.assertIn("lab@mail.org", emails)
+
+    def test_long_token_run_extraction(self):
+        """Test extraction next to a long run of email-like characters."""
+        blob = "QUJDRGVmZ2hpams0NTY3" * 2000
+        html = f"""
+        <img src="data:image/png;base64,{blob}">
+        <p>Contact: jane.doe@example.com</p>
+        """
+        emails = extract_emails_from_html(html)
+        self.assertIn("jane.doe@example.com", emails)
+        
+    def test_max_results_stops_at_first_email(self):
+        """Test that max_results returns only the first emails found."""
+        html = """
+        <p>first@example.com and second@example.com</p>
+        <a href="mailto:third@example.com">Mail</a>
+        """
+        emails = extract_emails_from_html(html, max_results=1)
+        self.assertEqual(emails, ["first@example.com"])
+        
+    def test_glued_addresses_extraction(self):
+        """Test that an address glued onto the end of another is still found."""
+        emails = list(_extract_emails_with_regex("john@example.com+jane@example.org"))
+        self.assertEqual(emails, ["john@example.com", "+jane@example.org"])
+        
     def test_javascript_obfuscation(self):
         """Test extraction of emails obfuscated with JavaScript."""
         html = """
@@ -62,6 +129,14 @@ class TestEmailExtractor(unittest.TestCase):
         self.assertIn("contact@example.com", emails)
         self.assertIn("info@example.org", emails)
         
+    def test_mixed_case_data_attributes(self):
+        """Test that data attributes are found regardless of their case."""
+        html = """
+        <span Data-Name="john.smith" Data-Domain="example.edu">Contact</span>
+        """
+        emails = extract_emails_from_html(html)
+        self.assertIn("john.smith@example.edu", emails)
+        
     def test_academic_page(self):
         """Test extraction from an academic page-like structure."""
         html = """
@@ -75,6 +150,26 @@ class TestEmailExtractor(unittest.TestCase):
                        any("smith" in email.lower() for email in emails) or
                        "faculty-no-reply@xyz.edu" in emails)
         
+    def test_preparsed_soup_reused(self):
+        """Test that a tree parsed by the caller gives the same emails."""
+        html = """
+        <a href="mailto:contact@example.com">Email</a>
+        <span data-name="john.smith" data-domain="example.edu">Contact</span>
+        """
+        soup = BeautifulSoup(html, "lxml")
+        self.assertEqual(
+            sorted(extract_emails_from_html(html, soup=soup)),
+            sorted(extract_emails_from_html(html))
+        )
+        
+    def test_no_email_markers(self):
+        """Test that a page without any email markers yields nothing."""
+        html = """
+        <h1>Jane Smith</h1>
+        <p>Professor of Physics. Office hours by appointment.</p>
+        """
+        self.assertEqual(extract_emails_from_html(html), [])
+        
     def test_invalid_emails_filtered(self):
         """Test that invalid emails are filtered out."""
         html = """
@@ -86,6 +181,12 @@ class TestEmailExtractor(unittest.TestCase):
         self.assertNotIn("@example.com", emails)
         self.assertNotIn("john@", emails)
         self.assertIn("john.doe@example.com", emails)
+        
+    def test_length_limits(self):
+        """Test the RFC 5321 local-part limit and the minimum domain length."""
+        self.assertTrue(_is_valid_email("a" * 64 + "@example.com"))
+        self.assertFalse(_is_valid_email("a" * 65 + "@example.com"))
+        self.assertFalse(_is_valid_email("john@a.b"))
 
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
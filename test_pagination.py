@@ -0,0 +1,62 @@
+"""
+Unit tests for the pagination helpers
+"""
+
+import unittest
+from pagination_utils import extract_page_number, filter_page_urls, search_faculty_by_prompt
+
+class TestExtractPageNumber(unittest.TestCase):
+    
+    def test_query_parameter(self):
+        """Test extraction from a single page query parameter."""
+        self.assertEqual(extract_page_number("https://example.com/people?page=4"), 4)
+        
+    def test_pattern_priority(self):
+        """Test that higher-priority markers win over ones earlier in the URL."""
+        self.assertEqual(extract_page_number("https://example.com/list?offset=20&page=3"), 3)
+        self.assertEqual(extract_page_number("https://example.com/list?p=2&page=5"), 5)
+        self.assertEqual(extract_page_number("https://example.com/list?current=1&pg=4"), 4)
+        self.assertEqual(extract_page_number("https://example.com/people-p-3/page/7"), 7)
+        
+    def test_query_before_path(self):
+        """Test that query parameters take priority over path markers."""
+        self.assertEqual(extract_page_number("https://example.com/archive-2023.html?page=2"), 2)
+        
+    def test_no_page_number(self):
+        """Test URLs without any page marker."""
+        self.assertIsNone(extract_page_number("https://example.com/faculty/jane-doe"))
+
+class TestFilterPageUrls(unittest.TestCase):
+    
+    def test_original_page_number_seen(self):
+        """Test that another URL for an original URL's page is dropped."""
+        seed = "https://example.com/people?page=2"
+        page_urls = [seed, "https://example.com/people/page/2", "https://example.com/people/page/3"]
+        self.assertEqual(filter_page_urls(page_urls, frozenset([seed]), 1, None, False),
+                         ["https://example.com/people/page/3"])
+        
+    def test_page_range(self):
+        """Test that pages outside the range and repeated pages are dropped."""
+        page_urls = [f"https://example.com/people?page={n}" for n in (1, 2, 3, 3, 5)]
+        self.assertEqual(filter_page_urls(page_urls, frozenset(), 2, 4, False),
+                         ["https://example.com/people?page=2", "https://example.com/people?page=3"])
+
+class TestSearchFacultyByPrompt(unittest.TestCase):
+    
+    PROFILES = [
+        {"name": "Jane Doe", "interests": "C++ compilers"},
+        {"name": "John Roe", "interests": "Java tooling"},
+    ]
+    
+    def test_word_prompt(self):
+        """Test filtering on ordinary words."""
+        matches = search_faculty_by_prompt(self.PROFILES, "compilers")
+        self.assertEqual([m["name"] for m in matches], ["Jane Doe"])
+        
+    def test_symbol_only_prompt(self):
+        """Test that a prompt without any two-letter word still filters."""
+        matches = search_faculty_by_prompt(self.PROFILES, "C++")
+        self.assertEqual([m["name"] for m in matches], ["Jane Doe"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Unit tests for the small-page batching helpers
+"""
+
+import unittest
+from scrape_batching import SCRAPE_BATCH_MAX_CHARS, SCRAPE_BATCH_MAX_PAGES, pack_small_pages, split_usage, add_usage
+
+def _page(name, chars):
+    return (name, "x" * chars)
+
+class TestPackSmallPages(unittest.TestCase):
+
+    def test_page_limit(self):
+        """Test that no batch holds more than SCRAPE_BATCH_MAX_PAGES pages."""
+        pages = [_page(f"p{i}", 10) for i in range(SCRAPE_BATCH_MAX_PAGES * 2 + 1)]
+        batches = pack_small_pages(pages)
+        self.assertEqual([len(batch) for batch in batches], [SCRAPE_BATCH_MAX_PAGES, SCRAPE_BATCH_MAX_PAGES, 1])
+
+    def test_char_limit(self):
+        """Test that a page which would overflow SCRAPE_BATCH_MAX_CHARS starts a new batch."""
+        size = SCRAPE_BATCH_MAX_CHARS // 3 + 1
+        batches = pack_small_pages([_page(f"p{i}", size) for i in range(3)])
+        self.assertEqual([len(batch) for batch in batches], [2, 1])
+        for batch in batches:
+            self.assertLessEqual(sum(len(page[-1]) for page in batch), SCRAPE_BATCH_MAX_CHARS)
+
+    def test_smallest_first(self):
+        """Test that pages are packed smallest first and none are lost."""
+        pages = [_page("big", 300), _page("small", 10), _page("mid", 100)]
+        batches = pack_small_pages(pages)
+        self.assertEqual([page[0] for page in batches[0]], ["small", "mid", "big"])
+
+    def test_empty(self):
+        """Test that no pages give no batches."""
+        self.assertEqual(pack_small_pages([]), [])
+
+class TestSplitUsage(unittest.TestCase):
+
+    def test_remainder_goes_first(self):
+        """Test that token remainders are spread over the first pages and totals are kept."""
+        shares = split_usage({"input_tokens": 10, "output_tokens": 5}, 0.9, 3)
+        self.assertEqual([counts for counts, _ in shares], [
+            {"input_tokens": 4, "output_tokens": 2},
+            {"input_tokens": 3, "output_tokens": 2},
+            {"input_tokens": 3, "output_tokens": 1},
+        ])
+        self.assertEqual(sum(counts["input_tokens"] for counts, _ in shares), 10)
+        self.assertEqual(sum(counts["output_tokens"] for counts, _ in shares), 5)
+
+    def test_cost_split_evenly(self):
+        """Test that the cost is divided evenly across pages."""
+        for _, cost in split_usage({"input_tokens": 1}, 0.9, 3):
+            self.assertAlmostEqual(cost, 0.3)
+
+class TestAddUsage(unittest.TestCase):
+
+    def test_merges_counts_and_cost(self):
+        """Test that a share is added onto a result, including keys only one side has."""
+        result = ({"listings": []}, {"input_tokens": 7}, 0.5)
+        merged = add_usage(result, ({"input_tokens": 3, "output_tokens": 2}, 0.25))
+        self.assertEqual(merged, ({"listings": []}, {"input_tokens": 10, "output_tokens": 2}, 0.75))
+
+    def test_none_share(self):
+        """Test that a missing share leaves the result unchanged."""
+        result = ({"listings": []}, {"input_tokens": 7}, 0.5)
+        self.assertIs(add_usage(result, None), result)
+
+    def test_none_result(self):
+        """Test that a failed retry stays None."""
+        self.assertIsNone(add_usage(None, ({"input_tokens": 3}, 0.25)))
+
+if __name__ == "__main__":
+    unittest.main()